@@ -0,0 +1,87 @@
+"""
+Benchmark the detection of the final answer in a stream of tokens.
+
+Compares the incremental matchers of `chainlit.answer_matcher` with the
+previous implementations (comparing the list of the last tokens, and searching
+the whole text streamed so far), for generations of 10k tokens where the answer
+prefix comes last.
+
+Run it from a Chainlit app directory (importing chainlit loads its config):
+
+    python path/to/backend/benchmarks/final_answer.py
+"""
+
+import random
+import re
+import string
+import time
+from typing import Callable, List
+
+from chainlit.answer_matcher import PatternAnswerMatcher, TokenAnswerMatcher
+
+TOKEN_COUNT = 10_000
+ANSWER_PREFIX_TOKENS = ["Final", "Answer", ":"]
+FINAL_ANSWER_PATTERN = r"Final Answer\s*:\s*(.*)"
+
+
+def generate_tokens(count: int) -> List[str]:
+    rng = random.Random(0)
+    tokens = [
+        " " + "".join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 8)))
+        for _ in range(count - len(ANSWER_PREFIX_TOKENS) - 1)
+    ]
+    return tokens + [" Final", " Answer", ":", " done"]
+
+
+def last_tokens_detection(tokens: List[str]) -> int:
+    prefix = [token.strip() for token in ANSWER_PREFIX_TOKENS]
+    last_tokens = [""] * len(prefix)
+    for i, token in enumerate(tokens):
+        last_tokens.append(token.strip())
+        last_tokens.pop(0)
+        if last_tokens == prefix or any(
+            [all(p in last_token for p in prefix) for last_token in last_tokens]
+        ):
+            return i
+    return -1
+
+
+def token_matcher_detection(tokens: List[str]) -> int:
+    matcher = TokenAnswerMatcher(ANSWER_PREFIX_TOKENS)
+    for i, token in enumerate(tokens):
+        if matcher.feed(token):
+            return i
+    return -1
+
+
+def full_text_detection(tokens: List[str]) -> int:
+    last_tokens = []  # type: List[str]
+    for i, token in enumerate(tokens):
+        last_tokens.append(token)
+        if re.search(FINAL_ANSWER_PATTERN, "".join(last_tokens)):
+            return i
+    return -1
+
+
+def pattern_matcher_detection(tokens: List[str]) -> int:
+    matcher = PatternAnswerMatcher(FINAL_ANSWER_PATTERN)
+    for i, token in enumerate(tokens):
+        if matcher.feed(token):
+            return i
+    return -1
+
+
+def bench(name: str, detect: Callable[[List[str]], int], tokens: List[str]):
+    start = time.perf_counter()
+    index = detect(tokens)
+    duration = time.perf_counter() - start
+    print(f"{name:<28} {duration * 1000:>10.1f} ms  (answer at token {index})")
+
+
+if __name__ == "__main__":
+    tokens = generate_tokens(TOKEN_COUNT)
+    print(f"{len(tokens)} tokens")
+    bench("last tokens (langchain)", last_tokens_detection, tokens)
+    bench("TokenAnswerMatcher", token_matcher_detection, tokens)
+    bench("full text regex (haystack)", full_text_detection, tokens)
+    bench("PatternAnswerMatcher", pattern_matcher_detection, tokens)
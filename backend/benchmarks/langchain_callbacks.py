@@ -0,0 +1,71 @@
+"""
+Benchmark the overhead of the LangChain callback handlers on an async chain.
+
+Runs a prompt | fake chat model | parser chain with the sync handler (its
+callbacks run in worker threads) and the async handler (its callbacks are
+awaited on the event loop), in a websocket session that discards the events.
+
+Run it from a Chainlit app directory (importing chainlit loads its config):
+
+    python path/to/backend/benchmarks/langchain_callbacks.py
+"""
+
+import asyncio
+import time
+
+from chainlit.context import init_ws_context
+from chainlit.langchain.callbacks import (
+    AsyncLangchainCallbackHandler,
+    LangchainCallbackHandler,
+)
+from chainlit.session import WebsocketSession
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+RUNS = 200
+
+
+async def discard(*args):
+    pass
+
+
+async def bench(name: str, handler_class, chain):
+    session = WebsocketSession(
+        id=name,
+        socket_id=name,
+        emit=discard,
+        emit_call=discard,
+        user_env={},
+        client_type="webapp",
+    )
+    init_ws_context(session)
+    handler = handler_class()
+
+    start = time.perf_counter()
+    for i in range(RUNS):
+        await chain.ainvoke({"question": i}, config={"callbacks": [handler]})
+    await handler.flush()
+    duration = time.perf_counter() - start
+    print(f"{name:<32} {duration / RUNS * 1000:>8.2f} ms per run")
+
+
+async def main():
+    chain = (
+        ChatPromptTemplate.from_template("Answer {question}")
+        | FakeListChatModel(responses=["Final Answer: 42"])
+        | StrOutputParser()
+    )
+
+    start = time.perf_counter()
+    for i in range(RUNS):
+        await chain.ainvoke({"question": i})
+    duration = time.perf_counter() - start
+    print(f"{'no callback handler':<32} {duration / RUNS * 1000:>8.2f} ms per run")
+
+    await bench("LangchainCallbackHandler", LangchainCallbackHandler, chain)
+    await bench("AsyncLangchainCallbackHandler", AsyncLangchainCallbackHandler, chain)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -22,6 +22,8 @@ if TYPE_CHECKING:
 
 import chainlit.input_widget as input_widget
 from chainlit.action import Action
+from chainlit.audio import AudioStream
+from chainlit.batch import batch, send_many
 from chainlit.cache import cache
 from chainlit.chat_settings import ChatSettings
 from chainlit.config import config
@@ -50,7 +52,7 @@ from chainlit.message import (
 )
 from chainlit.oauth_providers import get_configured_oauth_providers
 from chainlit.step import Step, step
-from chainlit.sync import make_async, run_sync
+from chainlit.sync import make_async, run_nowait, run_sync
 from chainlit.telemetry import trace
 from chainlit.types import AudioChunk, ChatProfile, ThreadDict
 from chainlit.user import PersistedUser, User
@@ -178,6 +180,8 @@ def on_chat_start(func: Callable) -> Callable:
 def on_chat_resume(func: Callable[[ThreadDict], Any]) -> Callable:
     """
     Hook to react to resume websocket connection event.
+    If `resume_page_size` is set in the config, the thread is a `LazyThread` holding its most recent steps,
+    call `await thread.load_all_steps()` to load the older ones. Otherwise it holds all of its steps.
 
     Args:
         func (Callable[], Any]): The connection hook to execute.
@@ -240,6 +244,22 @@ def on_audio_chunk(func: Callable) -> Callable:
     return func
 
 
+@trace
+def on_audio_stream(func: Callable) -> Callable:
+    """
+    Hook to consume the audio stream of a recording. Called once per recording, as an alternative to on_audio_chunk.
+
+    Args:
+        stream (AudioStream): The ordered stream of the audio chunks, to iterate with `async for`.
+
+    Returns:
+        Callable[], Any]: The decorated hook.
+    """
+
+    config.code.on_audio_stream = wrap_user_function(func, with_task=False)
+    return func
+
+
 @trace
 def on_audio_end(func: Callable) -> Callable:
     """
@@ -351,6 +371,7 @@ __all__ = [
     "user_session",
     "CopilotFunction",
     "AudioChunk",
+    "AudioStream",
     "Action",
     "User",
     "PersistedUser",
@@ -382,6 +403,9 @@ __all__ = [
     "on_chat_start",
     "on_chat_end",
     "on_chat_resume",
+    "on_audio_chunk",
+    "on_audio_stream",
+    "on_audio_end",
     "on_stop",
     "action_callback",
     "author_rename",
@@ -389,7 +413,10 @@ __all__ = [
     "password_auth_callback",
     "header_auth_callback",
     "sleep",
+    "batch",
+    "send_many",
     "run_sync",
+    "run_nowait",
     "make_async",
     "cache",
     "context",
@@ -30,7 +30,7 @@ class Action(DataClassJsonMixin):
     async def send(self, for_id: str):
         trace_event(f"send {self.__class__.__name__}")
         self.forId = for_id
-        await context.emitter.emit("action", self.to_dict())
+        await context.emitter.send_action(self.to_dict())
 
     async def remove(self):
         trace_event(f"remove {self.__class__.__name__}")
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from chainlit.config import config
+from chainlit.scheduler import scheduler
+from chainlit.session import ws_sessions_id
+
+
+class EventLoopLagMonitor:
+    """
+    Measure how late the event loop runs a callback scheduled at a fixed interval.
+    A saturated worker shows a growing lag.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        # Last measured lag (in seconds)
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._task = None  # type: Optional[asyncio.Task]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(loop.time() - start - self.interval, 0.0)
+            self.max_lag = max(self.max_lag, self.lag)
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+lag_monitor = EventLoopLagMonitor()
+
+
+class AdmissionController:
+    """
+    Decide whether a new websocket session is accepted, based on the event loop
+    lag, the number of active sessions and the number of messages being
+    processed. A threshold set to 0 is not checked.
+    """
+
+    def current(self) -> Dict[str, Any]:
+        return {
+            "event_loop_lag": lag_monitor.lag,
+            "sessions": len(ws_sessions_id),
+            "in_flight_messages": scheduler.running,
+        }
+
+    def thresholds(self) -> Dict[str, Any]:
+        settings = config.project.admission
+        return {
+            "event_loop_lag": settings.max_event_loop_lag,
+            "sessions": settings.max_sessions,
+            "in_flight_messages": settings.max_in_flight_messages,
+        }
+
+    def refusal_reasons(self) -> List[str]:
+        """Return the thresholds currently exceeded."""
+        current = self.current()
+        return [
+            key
+            for key, threshold in self.thresholds().items()
+            if threshold and current[key] >= threshold
+        ]
+
+    def state(self) -> Dict[str, Any]:
+        reasons = self.refusal_reasons()
+        return {
+            "accepting": not reasons,
+            "reasons": reasons,
+            "retryAfter": config.project.admission.retry_after,
+            "current": self.current(),
+            "thresholds": self.thresholds(),
+        }
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,105 @@
+import re
+from typing import List, Optional, Pattern, Union
+
+# Characters of the streamed text searched at most by a PatternAnswerMatcher
+DEFAULT_PATTERN_WINDOW = 1024
+
+
+class TokenAnswerMatcher:
+    """
+    Detect a sequence of tokens prefixing the final answer in a stream of tokens.
+
+    The tokens are matched incrementally (Knuth-Morris-Pratt over tokens), so
+    feeding a token costs the same whatever the length of the generation.
+    """
+
+    def __init__(self, prefix_tokens: List[str], strip_tokens: bool = True):
+        self.strip_tokens = strip_tokens
+        if strip_tokens:
+            self.prefix_tokens = [token.strip() for token in prefix_tokens]
+        else:
+            self.prefix_tokens = list(prefix_tokens)
+        self._failure = self._build_failure(self.prefix_tokens)
+        # Number of prefix tokens matched by the last tokens
+        self._matched = 0
+        self.answer_reached = False
+
+    @staticmethod
+    def _build_failure(tokens: List[str]) -> List[int]:
+        failure = [0] * len(tokens)
+        matched = 0
+        for i in range(1, len(tokens)):
+            while matched and tokens[i] != tokens[matched]:
+                matched = failure[matched - 1]
+            if tokens[i] == tokens[matched]:
+                matched += 1
+            failure[i] = matched
+        return failure
+
+    def reset(self):
+        self._matched = 0
+        self.answer_reached = False
+
+    def feed(self, token: str) -> bool:
+        """Add a token to the stream. Return True once the answer is reached."""
+        if self.answer_reached or not self.prefix_tokens:
+            return self.answer_reached
+
+        if self.strip_tokens:
+            token = token.strip()
+
+        prefix_tokens = self.prefix_tokens
+        matched = self._matched
+        if matched == len(prefix_tokens):
+            matched = self._failure[matched - 1]
+        while matched and token != prefix_tokens[matched]:
+            matched = self._failure[matched - 1]
+        if token == prefix_tokens[matched]:
+            matched += 1
+        self._matched = matched
+
+        # Some LLMs will consider all the tokens of the final answer as one token
+        # so we check if the token contains all answer tokens
+        self.answer_reached = matched == len(prefix_tokens) or all(
+            prefix_token in token for prefix_token in prefix_tokens
+        )
+        return self.answer_reached
+
+
+class PatternAnswerMatcher:
+    """
+    Detect the final answer in a stream of tokens with a regular expression.
+
+    Only the last `window` characters of the stream are searched, the pattern
+    must match the answer prefix within this window.
+    """
+
+    def __init__(
+        self,
+        pattern: Union[str, Pattern[str]],
+        window: int = DEFAULT_PATTERN_WINDOW,
+    ):
+        self.pattern = re.compile(pattern)
+        self.window = window
+        self._text = ""
+        self.answer_reached = False
+
+    def reset(self):
+        self._text = ""
+        self.answer_reached = False
+
+    def feed(self, token: str) -> Optional[re.Match]:
+        """Add a token to the stream. Return the match when the answer is reached."""
+        if self.answer_reached:
+            return None
+
+        text = self._text + token
+        if len(text) > self.window:
+            text = text[-self.window :]
+        self._text = text
+
+        match = self.pattern.search(text)
+        if match:
+            self.answer_reached = True
+            self._text = ""
+        return match
@@ -0,0 +1,133 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from chainlit.metrics import audio_chunks_dropped
+from chainlit.types import AudioChunk, AudioChunkPayload
+
+
+class AudioStream:
+    """
+    Ordered stream of the audio chunks of a recording.
+
+    Chunks are buffered in a ring buffer of `max_chunks`: when the consumer
+    can't keep up, the oldest chunks (but the first one of the recording) are
+    dropped instead of growing the memory.
+    Chunks received after a more recent one are dropped as late, so the
+    consumer always gets the audio in order. If `frame_size` is set, the chunks
+    are aggregated into frames of `frame_size` bytes (the last frame can be
+    shorter).
+
+    Iterate over the stream to consume the chunks:
+
+        async for chunk in stream:
+            ...
+    """
+
+    def __init__(self, max_chunks: int, frame_size: int = 0):
+        self.max_chunks = max(max_chunks, 1)
+        self.frame_size = frame_size
+
+        self.chunks = deque()  # type: Deque[AudioChunk]
+        self.mime_type = None  # type: Optional[str]
+        self.ended = False
+
+        self.received_count = 0
+        self.delivered_count = 0
+        self.dropped_count = 0
+        self.late_count = 0
+
+        self._last_elapsed_time = -1.0
+        self._is_start = True
+        # Chunks waiting to fill a frame
+        self._pending = []  # type: List[AudioChunkPayload]
+        self._pending_size = 0
+        self._not_empty = asyncio.Event()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buffered": len(self.chunks),
+            "received": self.received_count,
+            "delivered": self.delivered_count,
+            "dropped": self.dropped_count,
+            "late": self.late_count,
+        }
+
+    def put(self, payload: AudioChunkPayload):
+        """Add a chunk received from the client."""
+        if self.ended:
+            return
+
+        self.received_count += 1
+        if payload["elapsedTime"] < self._last_elapsed_time:
+            self.late_count += 1
+            audio_chunks_dropped.inc(reason="late")
+            return
+        self._last_elapsed_time = payload["elapsedTime"]
+        self.mime_type = self.mime_type or payload["mimeType"]
+
+        if self.frame_size <= 0:
+            self._append(payload["data"], payload["elapsedTime"])
+            return
+
+        self._pending.append(payload)
+        self._pending_size += len(payload["data"])
+        if self._pending_size >= self.frame_size:
+            self._flush()
+
+    def end(self):
+        """Mark the end of the recording, the buffered chunks are still delivered."""
+        if self.ended:
+            return
+        if self._pending:
+            self._flush(final=True)
+        self.ended = True
+        self._not_empty.set()
+
+    def _flush(self, final=False):
+        data = b"".join(payload["data"] for payload in self._pending)
+        elapsed_time = self._pending[0]["elapsedTime"]
+
+        # Only full frames are sent, until the end of the recording
+        size = len(data) if final else len(data) - len(data) % self.frame_size
+        for offset in range(0, size, self.frame_size):
+            self._append(data[offset : offset + self.frame_size], elapsed_time)
+
+        # Keep the remainder to start the next frame
+        remainder = data[size:]
+        self._pending = (
+            [dict(self._pending[-1], data=remainder)] if remainder else []  # type: ignore
+        )
+        self._pending_size = len(remainder)
+
+    def _append(self, data: bytes, elapsed_time: float):
+        if len(self.chunks) >= self.max_chunks:
+            # Keep the first chunk of the recording, it holds the container header
+            index = 1 if self.chunks[0].isStart and len(self.chunks) > 1 else 0
+            del self.chunks[index]
+            self.dropped_count += 1
+            audio_chunks_dropped.inc(reason="overflow")
+
+        self.chunks.append(
+            AudioChunk(
+                isStart=self._is_start,
+                mimeType=self.mime_type or "",
+                elapsedTime=elapsed_time,
+                data=data,
+            )
+        )
+        self._is_start = False
+        self._not_empty.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> AudioChunk:
+        while not self.chunks:
+            if self.ended:
+                raise StopAsyncIteration
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        self.delivered_count += 1
+        return self.chunks.popleft()
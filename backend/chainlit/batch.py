@@ -0,0 +1,136 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from chainlit.context import get_context
+from chainlit.data import get_data_layer
+from chainlit.logger import logger
+
+if TYPE_CHECKING:
+    from chainlit.action import Action
+    from chainlit.data import BaseDataLayer
+    from chainlit.element import Element, ElementDict
+    from chainlit.message import MessageBase
+    from chainlit.step import Step, StepDict
+
+
+class EventBatch:
+    """
+    Steps, elements and actions sent within a `batch`. They are sent to the UI
+    in a single `batch` event, and the steps are persisted with a single
+    `create_steps` call of the data layer. The elements are persisted after
+    the steps they are attached to.
+    """
+
+    def __init__(self) -> None:
+        self.steps: List["StepDict"] = []
+        self._steps_by_id: Dict[str, "StepDict"] = {}
+        self.elements: List["ElementDict"] = []
+        self.actions: List[Dict[str, Any]] = []
+        # Steps to create in the data layer, by id
+        self.persisted_steps: Dict[str, "StepDict"] = {}
+        # Elements to create in the data layer, once the steps are created
+        self.persisted_elements: List["Element"] = []
+
+    async def add_step(self, step_dict: "StepDict"):
+        self.steps.append(step_dict)
+        self._steps_by_id[step_dict["id"]] = step_dict
+
+    def has_step(self, step_id: str) -> bool:
+        return step_id in self._steps_by_id
+
+    async def patch_step(self, changes: "StepDict"):
+        # The step is not sent yet, send it with its latest state
+        self._steps_by_id[changes["id"]].update(changes)
+
+    async def add_element(self, element_dict: "ElementDict"):
+        self.elements.append(element_dict)
+
+    async def add_action(self, action_dict: Dict[str, Any]):
+        self.actions.append(action_dict)
+
+    def persist_step(self, step_dict: "StepDict"):
+        self.persisted_steps[step_dict["id"]] = step_dict
+
+    def persist_update(self, step_dict: "StepDict") -> bool:
+        """Update a step waiting to be created. Return False if it is not in the batch."""
+        if step_dict["id"] not in self.persisted_steps:
+            return False
+        self.persisted_steps[step_dict["id"]] = step_dict
+        return True
+
+    def persist_element(self, element: "Element"):
+        self.persisted_elements.append(element)
+
+    async def _persist(self, data_layer: "BaseDataLayer"):
+        if self.persisted_steps:
+            try:
+                await data_layer.create_steps(list(self.persisted_steps.values()))
+            except Exception as e:
+                logger.error(f"Failed to persist steps: {str(e)}")
+        for element in self.persisted_elements:
+            try:
+                await data_layer.create_element(element)
+            except Exception as e:
+                logger.error(f"Failed to create element: {str(e)}")
+
+    async def flush(self):
+        data_layer = get_data_layer()
+        if data_layer and (self.persisted_steps or self.persisted_elements):
+            asyncio.create_task(self._persist(data_layer))
+
+        if self.steps or self.elements or self.actions:
+            await get_context().emitter.send_batch(
+                self.steps, self.elements, self.actions
+            )
+
+
+current_batch: ContextVar[Optional[EventBatch]] = ContextVar(
+    "current_batch", default=None
+)
+
+
+@asynccontextmanager
+async def batch():
+    """
+    Send the steps, messages, elements and actions sent within the block at once,
+    when the block exits:
+
+        async with cl.batch():
+            for message in messages:
+                await message.send()
+    """
+    if current_batch.get() is not None:
+        # Nested batches are merged into the outer one
+        yield
+        return
+
+    event_batch = EventBatch()
+    token = current_batch.set(event_batch)
+    try:
+        yield
+    finally:
+        current_batch.reset(token)
+        await event_batch.flush()
+
+
+async def send_many(
+    items: List[Union["MessageBase", "Step", "Element", "Action"]],
+    for_id: Optional[str] = None,
+):
+    """
+    Send several messages, steps, elements and actions in a single event.
+    Elements and actions not attached to a message are attached to `for_id`.
+    """
+    from chainlit.action import Action
+    from chainlit.element import Element
+
+    async with batch():
+        for item in items:
+            if isinstance(item, (Element, Action)):
+                if not for_id:
+                    raise ValueError("for_id is required to send elements or actions")
+                await item.send(for_id=for_id)
+            else:
+                await item.send()
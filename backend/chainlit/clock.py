@@ -0,0 +1,28 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+_lock = threading.Lock()
+_last_timestamp = None  # type: Optional[datetime]
+
+
+def utc_now() -> str:
+    """
+    Return the current UTC time as an ISO 8601 string, strictly greater than
+    any timestamp previously returned in the process.
+
+    Steps and messages are ordered by their timestamps in the UI and the data
+    layer. When the wall clock did not move since the last call (or went
+    backward), the previous timestamp is bumped by one microsecond instead, so
+    a parent is always ordered before its children without waiting.
+    """
+    global _last_timestamp
+
+    with _lock:
+        now = datetime.utcnow()
+        if _last_timestamp is not None and now <= _last_timestamp:
+            now = _last_timestamp + timedelta(microseconds=1)
+        _last_timestamp = now
+
+    # Always include the microseconds so that the strings sort chronologically
+    return now.isoformat(timespec="microseconds") + "Z"
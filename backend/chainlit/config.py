@@ -16,6 +16,7 @@ from starlette.datastructures import Headers
 
 if TYPE_CHECKING:
     from chainlit.action import Action
+    from chainlit.audio import AudioStream
     from chainlit.element import ElementBased
     from chainlit.message import Message
     from chainlit.types import AudioChunk, ChatProfile, ThreadDict
@@ -60,6 +61,47 @@ allow_origins = ["*"]
 # Follow symlink for asset mount (see https://github.com/Chainlit/chainlit/issues/317)
 # follow_symlink = false
 
+# Maximum number of events waiting to be sent to a slow websocket client before backpressure is applied
+# max_outbound_queue_size = 1000
+
+# Number of events kept to be sent again to a client reconnecting after a network drop
+# replay_buffer_size = 500
+
+# How a message sent while the previous one is still processed is handled: "queue", "replace" or "reject"
+# message_policy = "queue"
+
+# Maximum number of messages processed at the same time by the server (0 for no limit)
+# max_concurrent_messages = 0
+
+# Number of messages sent when a thread is resumed, older ones are loaded when the user scrolls back (0 to send all of them)
+# resume_page_size = 0
+
+# Expose the Prometheus metrics at /metrics. They are not authenticated, only enable it if the route is not reachable publicly.
+# expose_metrics = false
+
+# Refuse new connections when the server is saturated, so that a load balancer can route them to another replica.
+# A threshold set to 0 is not checked.
+[project.admission]
+    # Event loop lag in seconds
+    max_event_loop_lag = 0
+    max_sessions = 0
+    max_in_flight_messages = 0
+    # Delay (in seconds) after which a refused client retries
+    retry_after = 5
+    # Expose the admission state at /admission (not authenticated) for the health checks of a load balancer
+    # expose_endpoint = false
+
+# Sample the steps sent to the UI and persisted. Rates go from 0 (never) to 1 (always).
+# The steps of a trace share the same draw, so traces are kept or dropped as a whole.
+[project.step_sampling]
+    # emit_rate = 1
+    # persist_rate = 1
+    # Rates applied on top of the ones above, by step type and by chat profile
+    # type_rates = {{ retrieval = 0.1 }}
+    # chat_profile_rates = {{}}
+    # Always send and persist the steps in error
+    # keep_errors = true
+
 [features]
 # Show the prompt playground
 prompt_playground = true
@@ -93,6 +135,10 @@ auto_tag_thread = true
     chunk_duration = 1000
     # Sample rate of the audio
     sample_rate = 44100
+    # Maximum number of audio chunks buffered on the server, the oldest are dropped when the app can't keep up
+    max_buffered_chunks = 100
+    # Aggregate the audio chunks into frames of this size (in bytes) before passing them to the app (0 to disable)
+    frame_size = 0
 
 [UI]
 # Name of the app and chatbot.
@@ -216,6 +262,8 @@ class AudioFeature(DataClassJsonMixin):
     chunk_duration: int = 1000
     max_duration: int = 15000
     sample_rate: int = 44100
+    max_buffered_chunks: int = 100
+    frame_size: int = 0
     enabled: bool = False
 
 
@@ -266,6 +314,7 @@ class CodeSettings:
     on_chat_resume: Optional[Callable[["ThreadDict"], Any]] = None
     on_message: Optional[Callable[["Message"], Any]] = None
     on_audio_chunk: Optional[Callable[["AudioChunk"], Any]] = None
+    on_audio_stream: Optional[Callable[["AudioStream"], Any]] = None
     on_audio_end: Optional[Callable[[List["ElementBased"]], Any]] = None
 
     author_rename: Optional[Callable[[str], str]] = None
@@ -275,6 +324,40 @@ class CodeSettings:
     )
 
 
+@dataclass
+class AdmissionSettings(DataClassJsonMixin):
+    # New connections are refused above these thresholds. 0 disables the check.
+    # Event loop lag in seconds
+    max_event_loop_lag: float = 0
+    max_sessions: int = 0
+    max_in_flight_messages: int = 0
+    # Delay (in seconds) after which a refused client should retry
+    retry_after: int = 5
+    # Expose the admission state at /admission, without authentication
+    expose_endpoint: bool = False
+
+
+@dataclass
+class StepSamplingSettings(DataClassJsonMixin):
+    # Fraction (0 to 1) of the traces sent to the UI and persisted
+    emit_rate: float = 1
+    persist_rate: float = 1
+    # Rates applied on top of the ones above, by step type and by chat profile
+    type_rates: Dict[str, float] = Field(default_factory=dict)
+    chat_profile_rates: Dict[str, float] = Field(default_factory=dict)
+    # Always send and persist the steps in error
+    keep_errors: bool = True
+
+    @property
+    def enabled(self) -> bool:
+        return (
+            self.emit_rate < 1
+            or self.persist_rate < 1
+            or bool(self.type_rates)
+            or bool(self.chat_profile_rates)
+        )
+
+
 @dataclass()
 class ProjectSettings(DataClassJsonMixin):
     allow_origins: List[str] = Field(default_factory=lambda: ["*"])
@@ -290,6 +373,22 @@ class ProjectSettings(DataClassJsonMixin):
     cache: bool = False
     # Follow symlink for asset mount (see https://github.com/Chainlit/chainlit/issues/317)
     follow_symlink: bool = False
+    # Maximum number of events waiting to be sent to a websocket client before backpressure is applied
+    max_outbound_queue_size: int = 1000
+    # Number of events kept to be replayed to a reconnecting client
+    replay_buffer_size: int = 500
+    # How a message received while the previous one is still processed is handled
+    message_policy: Literal["queue", "replace", "reject"] = "queue"
+    # Maximum number of messages processed at the same time by the process (0 for no limit)
+    max_concurrent_messages: int = 0
+    # Number of root steps sent when a thread is resumed (0 for all of them)
+    resume_page_size: int = 0
+    # Expose the Prometheus metrics at /metrics, without authentication
+    expose_metrics: bool = False
+    # Refuse new connections when the server is saturated
+    admission: AdmissionSettings = Field(default_factory=AdmissionSettings)
+    # Sample the steps sent to the UI and persisted
+    step_sampling: StepSamplingSettings = Field(default_factory=StepSamplingSettings)
 
 
 @dataclass()
@@ -1,8 +1,11 @@
 import asyncio
+import threading
 import uuid
+from collections import OrderedDict, deque
 from contextvars import ContextVar
-from typing import TYPE_CHECKING, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Coroutine, Deque, Dict, List, Optional, Union
 
+from chainlit.logger import logger
 from chainlit.session import ClientType, HTTPSession, WebsocketSession
 from lazify import LazyProxy
 
@@ -17,6 +20,42 @@ class ChainlitContextException(Exception):
         super().__init__(msg, *args, **kwargs)
 
 
+class LoopCallQueue:
+    """
+    Coroutines posted from worker threads, run one after the other on the event loop.
+
+    Posting never blocks the worker thread: the coroutine is queued and the
+    loop is woken up once for all the coroutines queued meanwhile.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.calls: Deque[Coroutine[Any, Any, Any]] = deque()
+        self._lock = threading.Lock()
+        self._draining = False
+
+    def post(self, co: Coroutine[Any, Any, Any]):
+        self.calls.append(co)
+        with self._lock:
+            if self._draining:
+                return
+            self._draining = True
+        self.loop.call_soon_threadsafe(lambda: self.loop.create_task(self._drain()))
+
+    async def _drain(self):
+        while True:
+            with self._lock:
+                if not self.calls:
+                    self._draining = False
+                    return
+            while self.calls:
+                co = self.calls.popleft()
+                try:
+                    await co
+                except Exception as e:
+                    logger.error(f"Error while running {co.__qualname__}: {e}")
+
+
 class ChainlitContext:
     loop: asyncio.AbstractEventLoop
     emitter: "BaseChainlitEmitter"
@@ -25,8 +64,11 @@ class ChainlitContext:
 
     @property
     def current_step(self):
-        if self.active_steps:
-            return self.active_steps[-1]
+        # Only the steps of the current task, the context is shared by the
+        # concurrent handlers of a websocket session
+        steps = local_steps.get()
+        if steps:
+            return steps[-1]
 
     def __init__(
         self,
@@ -38,6 +80,11 @@ class ChainlitContext:
         self.loop = asyncio.get_running_loop()
         self.session = session
         self.active_steps = []
+        # Steps sent while sampling, by id, so that the steps of a trace share its
+        # sampling (see `Step._get_parent_step`)
+        self.sampled_steps: "OrderedDict[str, Step]" = OrderedDict()
+        # Coroutines posted from worker threads, see `run_nowait`
+        self.thread_calls = LoopCallQueue(self.loop)
 
         if emitter:
             self.emitter = emitter
@@ -57,7 +104,11 @@ def init_ws_context(session_or_sid: Union[WebsocketSession, str]) -> ChainlitCon
         session = WebsocketSession.require(session_or_sid)
     else:
         session = session_or_sid
-    context = ChainlitContext(session)
+    # Reuse the context of the session across the socket events
+    context = session.context
+    if not context or context.loop is not asyncio.get_running_loop():
+        context = ChainlitContext(session)
+        session.context = context
     context_var.set(context)
     return context
 
@@ -1,7 +1,10 @@
 import functools
+import inspect
 import json
 import os
+import time
 from collections import deque
+from contextvars import ContextVar
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -10,6 +13,7 @@ from typing import (
     Literal,
     Optional,
     Protocol,
+    Tuple,
     Union,
     cast,
 )
@@ -18,7 +22,13 @@ import aiofiles
 from chainlit.config import config
 from chainlit.context import context
 from chainlit.logger import logger
+from chainlit.metrics import (
+    data_layer_duration,
+    data_layer_errors,
+    data_layer_in_flight,
+)
 from chainlit.session import WebsocketSession
+from chainlit.thread import paginate_thread
 from chainlit.types import (
     Feedback,
     PageInfo,
@@ -26,6 +36,7 @@ from chainlit.types import (
     Pagination,
     ThreadDict,
     ThreadFilter,
+    ThreadPageDict,
 )
 from chainlit.user import PersistedUser, User
 from literalai import Attachment
@@ -39,6 +50,10 @@ if TYPE_CHECKING:
     from chainlit.step import FeedbackDict, StepDict
 
 
+# Contents remembered as stored by a data layer (see `Element.content_key`)
+MAX_UPLOADED_CONTENTS = 10_000
+
+
 def queue_until_user_message():
     def decorator(method):
         @functools.wraps(method)
@@ -63,9 +78,58 @@ def queue_until_user_message():
     return decorator
 
 
+# Data layer method being recorded, as (data layer id, method name)
+instrumented_call: ContextVar[Optional[Tuple[int, str]]] = ContextVar(
+    "instrumented_call", default=None
+)
+
+
+def instrument_data_layer_method(method):
+    """Record the duration, errors and calls in flight of a data layer method."""
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        method_name = method.__name__
+        call = (id(self), method_name)
+        if instrumented_call.get() == call:
+            # An override calling super(), the call is already recorded
+            return await method(self, *args, **kwargs)
+
+        token = instrumented_call.set(call)
+        data_layer_in_flight.inc(method=method_name)
+        start = time.monotonic()
+        try:
+            return await method(self, *args, **kwargs)
+        except Exception:
+            data_layer_errors.inc(method=method_name)
+            raise
+        finally:
+            instrumented_call.reset(token)
+            data_layer_in_flight.dec(method=method_name)
+            data_layer_duration.observe(time.monotonic() - start, method=method_name)
+
+    wrapper.instrumented = True  # type: ignore
+    return wrapper
+
+
 class BaseDataLayer:
     """Base class for data persistence."""
 
+    # If True, update_step receives the changed fields of the step (with its id
+    # and threadId) instead of the whole step
+    partial_step_updates = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Instrument the data layer implementations, including the custom ones
+        for name, attr in list(vars(cls).items()):
+            if (
+                not name.startswith("_")
+                and inspect.iscoroutinefunction(attr)
+                and not getattr(attr, "instrumented", False)
+            ):
+                setattr(cls, name, instrument_data_layer_method(attr))
+
     async def get_user(self, identifier: str) -> Optional["PersistedUser"]:
         return None
 
@@ -101,6 +165,14 @@ class BaseDataLayer:
     async def create_step(self, step_dict: "StepDict"):
         pass
 
+    async def create_steps(self, step_dicts: List["StepDict"]):
+        """
+        Create several steps, parents first. Override it to use a bulk insert of the storage,
+        the default implementation creates them one by one.
+        """
+        for step_dict in step_dicts:
+            await self.create_step(step_dict)
+
     @queue_until_user_message()
     async def update_step(self, step_dict: "StepDict"):
         pass
@@ -126,6 +198,18 @@ class BaseDataLayer:
     async def get_thread(self, thread_id: str) -> "Optional[ThreadDict]":
         return None
 
+    async def get_thread_page(
+        self, thread_id: str, pagination: "Pagination"
+    ) -> "Optional[ThreadPageDict]":
+        """
+        Return the thread with a page of its root steps, most recent first (see `paginate_thread`).
+        The default implementation loads the whole thread, override it to paginate in the storage.
+        """
+        thread = await self.get_thread(thread_id)
+        if not thread:
+            return None
+        return paginate_thread(thread, pagination)
+
     async def update_thread(
         self,
         thread_id: str,
@@ -148,6 +232,8 @@ class ChainlitDataLayer(BaseDataLayer):
         from literalai import AsyncLiteralClient
 
         self.client = AsyncLiteralClient(api_key=api_key, url=server)
+        # Object key of the uploaded contents, by (thread id, content key)
+        self.uploaded_contents: Dict[Tuple[Optional[str], str], str] = {}
         logger.info("Chainlit data layer initialized")
 
     def attachment_to_element_dict(self, attachment: Attachment) -> "ElementDict":
@@ -298,8 +384,14 @@ class ChainlitDataLayer(BaseDataLayer):
             return
 
         object_key = None
+        content_key = (
+            (element.thread_id, element.content_key) if element.content_key else None
+        )
 
-        if not element.url:
+        if not element.url and content_key in self.uploaded_contents:
+            # The same content is already stored for the thread
+            object_key = self.uploaded_contents[content_key]
+        elif not element.url:
             if element.path:
                 async with aiofiles.open(element.path, "rb") as f:
                     content = await f.read()  # type: Union[bytes, str]
@@ -311,6 +403,10 @@ class ChainlitDataLayer(BaseDataLayer):
                 content=content, mime=element.mime, thread_id=element.thread_id
             )
             object_key = uploaded["object_key"]
+            if content_key and object_key:
+                if len(self.uploaded_contents) >= MAX_UPLOADED_CONTENTS:
+                    self.uploaded_contents.clear()
+                self.uploaded_contents[content_key] = object_key
 
         await self.client.api.send_steps(
             [
@@ -343,8 +439,7 @@ class ChainlitDataLayer(BaseDataLayer):
     async def delete_element(self, element_id: str):
         await self.client.api.delete_attachment(id=element_id)
 
-    @queue_until_user_message()
-    async def create_step(self, step_dict: "StepDict"):
+    def _to_literal_step(self, step_dict: "StepDict") -> LiteralStepDict:
         metadata = dict(
             step_dict.get("metadata", {}),
             **{
@@ -375,7 +470,17 @@ class ChainlitDataLayer(BaseDataLayer):
         if step_dict.get("isError"):
             step["error"] = step_dict.get("output")
 
-        await self.client.api.send_steps([step])
+        return step
+
+    @queue_until_user_message()
+    async def create_step(self, step_dict: "StepDict"):
+        await self.client.api.send_steps([self._to_literal_step(step_dict)])
+
+    @queue_until_user_message()
+    async def create_steps(self, step_dicts: List["StepDict"]):
+        await self.client.api.send_steps(
+            [self._to_literal_step(step_dict) for step_dict in step_dicts]
+        )
 
     @queue_until_user_message()
     async def update_step(self, step_dict: "StepDict"):
@@ -8,7 +8,12 @@ from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 import aiofiles
 import aiohttp
 from chainlit.context import context
-from chainlit.data import BaseDataLayer, BaseStorageClient, queue_until_user_message
+from chainlit.data import (
+    MAX_UPLOADED_CONTENTS,
+    BaseDataLayer,
+    BaseStorageClient,
+    queue_until_user_message,
+)
 from chainlit.element import Avatar, ElementDict
 from chainlit.logger import logger
 from chainlit.step import StepDict
@@ -43,6 +48,8 @@ class SQLAlchemyDataLayer(BaseDataLayer):
     ):
         self._conninfo = conninfo
         self.user_thread_limit = user_thread_limit
+        # Uploaded files of the contents shared by elements, by object key
+        self.uploaded_contents: Dict[str, Dict[str, Any]] = {}
         self.show_logger = show_logger
         ssl_args = {}
         if ssl_require:
@@ -367,6 +374,16 @@ class SQLAlchemyDataLayer(BaseDataLayer):
         if not element.for_id:
             return
 
+        context_user = context.session.user
+
+        user_folder = getattr(context_user, "id", "unknown")
+        if element.content_key:
+            # The elements sharing a content key share the same file
+            file_object_key = f"{user_folder}/contents/{element.content_key}"
+            if uploaded_file := self.uploaded_contents.get(file_object_key):
+                await self._insert_element(element, uploaded_file)
+                return
+
         content: Optional[Union[bytes, str]] = None
 
         if element.path:
@@ -386,12 +403,10 @@ class SQLAlchemyDataLayer(BaseDataLayer):
         if content is None:
             raise ValueError("Content is None, cannot upload file")
 
-        context_user = context.session.user
-
-        user_folder = getattr(context_user, "id", "unknown")
-        file_object_key = f"{user_folder}/{element.id}" + (
-            f"/{element.name}" if element.name else ""
-        )
+        if not element.content_key:
+            file_object_key = f"{user_folder}/{element.id}" + (
+                f"/{element.name}" if element.name else ""
+            )
 
         if not element.mime:
             element.mime = "application/octet-stream"
@@ -403,7 +418,14 @@ class SQLAlchemyDataLayer(BaseDataLayer):
             raise ValueError(
                 "SQLAlchemy Error: create_element, Failed to persist data in storage_provider"
             )
+        if element.content_key:
+            if len(self.uploaded_contents) >= MAX_UPLOADED_CONTENTS:
+                self.uploaded_contents.clear()
+            self.uploaded_contents[file_object_key] = uploaded_file
+
+        await self._insert_element(element, uploaded_file)
 
+    async def _insert_element(self, element: "Element", uploaded_file: Dict[str, Any]):
         element_dict: ElementDict = element.to_dict()
 
         element_dict["url"] = uploaded_file.get("url")
@@ -6,7 +6,8 @@ from typing import Any, ClassVar, List, Literal, Optional, TypedDict, TypeVar, U
 
 import filetype
 import mimetypes
-from chainlit.context import context
+from chainlit.batch import current_batch
+from chainlit.context import get_context
 from chainlit.data import get_data_layer
 from chainlit.logger import logger
 from chainlit.telemetry import trace_event
@@ -72,12 +73,14 @@ class Element:
     language: Optional[str] = None
     # Mime type, infered based on content if not provided
     mime: Optional[str] = None
+    # Key of the content (e.g. its hash), the data layers store the content of elements sharing a key once
+    content_key: Optional[str] = None
 
     def __post_init__(self) -> None:
         trace_event(f"init {self.__class__.__name__}")
         self.persisted = False
         self.updatable = False
-        self.thread_id = context.session.thread_id
+        self.thread_id = get_context().session.thread_id
 
         if not self.url and not self.path and not self.content:
             raise ValueError("Must provide url, path or content to instantiate element")
@@ -130,11 +133,15 @@ class Element:
             return True
         if data_layer := get_data_layer():
             try:
-                asyncio.create_task(data_layer.create_element(self))
+                if batch := current_batch.get():
+                    # Created after the steps of the batch
+                    batch.persist_element(self)
+                else:
+                    asyncio.create_task(data_layer.create_element(self))
             except Exception as e:
                 logger.error(f"Failed to create element: {str(e)}")
         if not self.url and (not self.chainlit_key or self.updatable):
-            file_dict = await context.session.persist_file(
+            file_dict = await get_context().session.persist_file(
                 name=self.name,
                 path=self.path,
                 content=self.content,
@@ -151,7 +158,7 @@ class Element:
         data_layer = get_data_layer()
         if data_layer and self.persisted:
             await data_layer.delete_element(self.id)
-        await context.emitter.emit("remove_element", {"id": self.id})
+        await get_context().emitter.emit("remove_element", {"id": self.id})
 
     async def send(self, for_id: str):
         if self.persisted and not self.updatable:
@@ -175,7 +182,7 @@ class Element:
             raise ValueError("Must provide url or chainlit key to send element")
 
         trace_event(f"send {self.__class__.__name__}")
-        await context.emitter.send_element(self.to_dict())
+        await get_context().emitter.send_element(self.to_dict())
 
 
 ElementBased = TypeVar("ElementBased", bound=Element)
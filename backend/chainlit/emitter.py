@@ -2,6 +2,8 @@ import asyncio
 import uuid
 from typing import Any, Dict, List, Literal, Optional, Union, cast
 
+from chainlit.batch import current_batch
+from chainlit.clock import utc_now
 from chainlit.config import config
 from chainlit.data import get_data_layer
 from chainlit.element import Element, ElementDict, File
@@ -18,7 +20,6 @@ from chainlit.types import (
     UIMessagePayload,
 )
 from chainlit.user import PersistedUser
-from literalai.helper import utc_now
 from socketio.exceptions import TimeoutError
 
 
@@ -39,8 +40,10 @@ class BaseChainlitEmitter:
         """Stub method to get the 'emit' property from the session."""
         pass
 
-    async def emit_call(self):
-        """Stub method to get the 'emit_call' property from the session."""
+    async def emit_call(
+        self, event: Literal["ask", "call_fn"], data: Any, timeout: Optional[int]
+    ):
+        """Stub method to emit to the client and wait for a response."""
         pass
 
     async def resume_thread(self, thread_dict: ThreadDict):
@@ -59,6 +62,28 @@ class BaseChainlitEmitter:
         """Stub method to update a message in the UI."""
         pass
 
+    async def patch_step(self, step_dict: StepDict, changes: StepDict):
+        """Update a message in the UI. Send the whole message by default."""
+        await self.update_step(step_dict)
+
+    async def send_action(self, action_dict: Dict[str, Any]):
+        """Stub method to send an action to the UI."""
+        pass
+
+    async def send_batch(
+        self,
+        steps: List[StepDict],
+        elements: List[ElementDict],
+        actions: List[Dict[str, Any]],
+    ):
+        """Send steps, elements and actions at once. Send them one by one by default."""
+        for step_dict in steps:
+            await self.send_step(step_dict)
+        for element_dict in elements:
+            await self.send_element(element_dict)
+        for action_dict in actions:
+            await self.send_action(action_dict)
+
     async def delete_step(self, step_dict: StepDict):
         """Stub method to delete a message in the UI."""
         pass
@@ -143,31 +168,62 @@ class ChainlitEmitter(BaseChainlitEmitter):
 
     @property
     def emit(self):
-        """Get the 'emit' property from the session."""
+        """Get the function queueing an event in the session outbound queue."""
 
-        return self._get_session_property("emit")
+        # Hot path (called for every streamed token), skip the property lookup helper
+        return self.session.outbound.put
 
-    @property
-    def emit_call(self):
-        """Get the 'emit_call' property from the session."""
-        return self._get_session_property("emit_call")
+    async def emit_call(
+        self, event: Literal["ask", "call_fn"], data: Any, timeout: Optional[int]
+    ):
+        """Emit to the client and wait for a response, once the queued events are sent."""
+        await self._get_session_property("outbound").join()
+        return await self._get_session_property("emit_call")(event, data, timeout)
 
     def resume_thread(self, thread_dict: ThreadDict):
         """Send a thread to the UI to resume it"""
         return self.emit("resume_thread", thread_dict)
 
     async def send_element(self, element_dict: ElementDict):
-        """Stub method to send an element to the UI."""
+        """Send an element to the UI."""
+        if batch := current_batch.get():
+            return await batch.add_element(element_dict)
         await self.emit("element", element_dict)
 
     def send_step(self, step_dict: StepDict):
         """Send a message to the UI."""
+        if batch := current_batch.get():
+            return batch.add_step(step_dict)
         return self.emit("new_message", step_dict)
 
     def update_step(self, step_dict: StepDict):
         """Update a message in the UI."""
         return self.emit("update_message", step_dict)
 
+    def patch_step(self, step_dict: StepDict, changes: StepDict):
+        """Update the changed fields of a message in the UI."""
+        batch = current_batch.get()
+        if batch and batch.has_step(changes["id"]):
+            return batch.patch_step(changes)
+        return self.emit("update_message", changes)
+
+    def send_action(self, action_dict: Dict[str, Any]):
+        """Send an action to the UI."""
+        if batch := current_batch.get():
+            return batch.add_action(action_dict)
+        return self.emit("action", action_dict)
+
+    def send_batch(
+        self,
+        steps: List[StepDict],
+        elements: List[ElementDict],
+        actions: List[Dict[str, Any]],
+    ):
+        """Send steps, elements and actions to the UI in a single event."""
+        return self.emit(
+            "batch", {"steps": steps, "elements": elements, "actions": actions}
+        )
+
     def delete_step(self, step_dict: StepDict):
         """Delete a message in the UI."""
         return self.emit("delete_message", step_dict)
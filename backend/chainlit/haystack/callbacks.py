@@ -1,12 +1,12 @@
-import re
 from typing import Any, Generic, List, Optional, TypeVar
 
+from chainlit.answer_matcher import PatternAnswerMatcher
+from chainlit.clock import utc_now
 from chainlit.context import context
 from chainlit.step import Step
 from chainlit.sync import run_sync
 from haystack.agents import Agent, Tool
 from haystack.agents.agent_step import AgentStep
-from literalai.helper import utc_now
 
 from chainlit import Message
 
@@ -65,8 +65,7 @@ class HaystackAgentCallbackHandler:
             self.final_stream = Message(
                 author=self.stream_final_answer_agent_name, content=""
             )
-            self.last_tokens: List[str] = []
-            self.answer_reached = False
+            self.answer_matcher = PatternAnswerMatcher(self.final_answer_pattern)
 
         root_message = context.session.root_message
         parent_id = root_message.id if root_message else None
@@ -104,18 +103,12 @@ class HaystackAgentCallbackHandler:
     def on_new_token(self, token, **kwargs: Any) -> None:
         # Stream agent step tokens
         if self.stream_final_answer:
-            if self.answer_reached:
+            if self.answer_matcher.answer_reached:
                 run_sync(self.final_stream.stream_token(token))
             else:
-                self.last_tokens.append(token)
-
-                last_tokens_concat = "".join(self.last_tokens)
-                final_answer_match = re.search(
-                    self.final_answer_pattern, last_tokens_concat
-                )
+                final_answer_match = self.answer_matcher.feed(token)
 
                 if final_answer_match:
-                    self.answer_reached = True
                     run_sync(
                         self.final_stream.stream_token(final_answer_match.group(1))
                     )
@@ -1,18 +1,36 @@
+import asyncio
 import json
+import re
+import threading
 import time
-from typing import Any, Dict, List, Optional, TypedDict, Union
+from collections import OrderedDict, deque
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    FrozenSet,
+    List,
+    Literal,
+    Optional,
+    Pattern,
+    Tuple,
+    TypedDict,
+    Union,
+)
 from uuid import UUID
 
-from chainlit.context import context_var
+from chainlit.answer_matcher import TokenAnswerMatcher
+from chainlit.clock import utc_now
+from chainlit.context import ChainlitContext, context_var
+from chainlit.logger import logger
 from chainlit.message import Message
-from chainlit.step import Step
+from chainlit.step import MAX_CONTENT_DEPTH, TRUNCATED_CONTENT, Step
 from langchain.callbacks.tracers.base import BaseTracer
 from langchain.callbacks.tracers.schemas import Run
-from langchain.schema import BaseMessage
+from langchain.schema import BaseMessage, Document, get_buffer_string
 from langchain.schema.output import ChatGenerationChunk, GenerationChunk
 from langchain_core.outputs import ChatGenerationChunk, GenerationChunk
 from literalai import ChatGeneration, CompletionGeneration, GenerationMessage
-from literalai.helper import utc_now
 from literalai.step import TrueStepType
 
 DEFAULT_ANSWER_PREFIX_TOKENS = ["Final", "Answer", ":"]
@@ -42,15 +60,9 @@ class FinalStreamHelper:
             self.answer_prefix_tokens = DEFAULT_ANSWER_PREFIX_TOKENS
         else:
             self.answer_prefix_tokens = answer_prefix_tokens
-        if strip_tokens:
-            self.answer_prefix_tokens_stripped = [
-                token.strip() for token in self.answer_prefix_tokens
-            ]
-        else:
-            self.answer_prefix_tokens_stripped = self.answer_prefix_tokens
-
-        self.last_tokens = [""] * len(self.answer_prefix_tokens)
-        self.last_tokens_stripped = [""] * len(self.answer_prefix_tokens)
+        self.answer_matcher = TokenAnswerMatcher(
+            self.answer_prefix_tokens, strip_tokens=strip_tokens
+        )
         self.strip_tokens = strip_tokens
         self.answer_reached = force_stream_final_answer
 
@@ -60,34 +72,10 @@ class FinalStreamHelper:
         self.has_streamed_final_answer = False
 
     def _check_if_answer_reached(self) -> bool:
-        if self.strip_tokens:
-            return self._compare_last_tokens(self.last_tokens_stripped)
-        else:
-            return self._compare_last_tokens(self.last_tokens)
-
-    def _compare_last_tokens(self, last_tokens: List[str]):
-        if last_tokens == self.answer_prefix_tokens_stripped:
-            # If tokens match perfectly we are done
-            return True
-        else:
-            # Some LLMs will consider all the tokens of the final answer as one token
-            # so we check if any last token contains all answer tokens
-            return any(
-                [
-                    all(
-                        answer_token in last_token
-                        for answer_token in self.answer_prefix_tokens_stripped
-                    )
-                    for last_token in last_tokens
-                ]
-            )
+        return self.answer_matcher.answer_reached
 
     def _append_to_last_tokens(self, token: str) -> None:
-        self.last_tokens.append(token)
-        self.last_tokens_stripped.append(token.strip())
-        if len(self.last_tokens) > len(self.answer_prefix_tokens):
-            self.last_tokens.pop(0)
-            self.last_tokens_stripped.pop(0)
+        self.answer_matcher.feed(token)
 
 
 class ChatGenerationStart(TypedDict):
@@ -231,12 +219,148 @@ class GenerationHelper:
 
 DEFAULT_TO_IGNORE = ["Runnable", "<lambda>"]
 DEFAULT_TO_KEEP = ["retriever", "llm", "agent", "chain", "tool"]
+# Runs tracked at most by a tracer, in case some runs never end
+DEFAULT_MAX_TRACKED_RUNS = 1000
+# Run names whose ignore decision is memoised at most by a tracer
+MAX_MEMOISED_RUN_NAMES = 1000
+# Characters of the input and output of a step, and of a string in the inputs
+DEFAULT_MAX_CONTENT_SIZE = 100_000
+# Characters of the content of a document
+DEFAULT_MAX_DOCUMENT_SIZE = 1000
+
+
+TracerEventKind = Literal["send", "update", "token"]
+
+
+class TracerEventQueue:
+    """
+    Ordered queue of the UI events of a tracer.
+
+    The callbacks of a tracer can run in worker threads. They only queue the
+    events, and a single task drains them in order on the event loop, so an
+    update never lands before the send of its step. Consecutive updates of a
+    step (read when sent) and consecutive tokens of a message are coalesced.
+
+    In inline mode, the events put on the event loop are sent by `process`
+    from the task of the caller instead of a drain task.
+    """
+
+    def __init__(self, context: ChainlitContext, inline: bool = False):
+        self.context = context
+        self.loop = context.loop
+        self.inline = inline
+        # Events as [kind, step or message, token]
+        self.events = deque()  # type: Deque[List[Any]]
+        self._lock = threading.Lock()
+        self._draining = False
+        self._drained = None  # type: Optional[asyncio.Event]
+
+    def put(
+        self,
+        kind: TracerEventKind,
+        target: Union[Step, Message],
+        token: Optional[str] = None,
+    ):
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        with self._lock:
+            last = self.events[-1] if self.events else None
+            if last and last[1] is target:
+                if kind == "update" and last[0] in ("send", "update"):
+                    return
+                if kind == "token" and last[0] == "token":
+                    last[2] += token
+                    return
+            self.events.append([kind, target, token])
+
+            if self._draining or (self.inline and running_loop is self.loop):
+                return
+            self._draining = True
+
+        if running_loop is self.loop:
+            self.loop.create_task(self._drain())
+        else:
+            self.loop.call_soon_threadsafe(lambda: self.loop.create_task(self._drain()))
+
+    async def _drain(self):
+        context_var.set(self.context)
+        while True:
+            with self._lock:
+                if not self.events:
+                    self._draining = False
+                    if self._drained:
+                        self._drained.set()
+                    return
+                kind, target, token = self.events.popleft()
+            try:
+                if kind == "send":
+                    await target.send()
+                elif kind == "update":
+                    await target.update()
+                else:
+                    await target.stream_token(token)
+            except Exception as e:
+                logger.error(f"Failed to send the {kind} event of a trace: {e}")
+
+    async def process(self):
+        """Send the queued events, if awaited on the event loop."""
+        if asyncio.get_running_loop() is not self.loop:
+            # Events put from another loop are sent by a drain task
+            return
+
+        with self._lock:
+            if not self.events:
+                return
+            drain = not self._draining
+            self._draining = True
+
+        if not drain:
+            # A drain task is already sending them
+            await self._wait_drained()
+            return
+
+        try:
+            await self._drain()
+        except asyncio.CancelledError:
+            with self._lock:
+                self._draining = False
+            if self._drained:
+                self._drained.set()
+            raise
+
+    async def _wait_drained(self):
+        while self._draining:
+            if not self._drained or self._drained.is_set():
+                self._drained = asyncio.Event()
+            await self._drained.wait()
+
+    async def flush(self):
+        """Wait until the queued events are sent. Must be awaited on the event loop."""
+        await self.process()
+        await self._wait_drained()
 
 
 class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
     steps: Dict[str, Step]
     parent_id_map: Dict[str, str]
     ignored_runs: set
+    # Parent run id of the tracked runs, from the least to the most recently active
+    run_parents: "OrderedDict[str, Optional[str]]"
+    # Number of children still running, by run id
+    live_children: Dict[str, int]
+    # Runs that ended while some of their children were still running
+    ended_runs: set
+    # Trace (root run) id of the tracked runs, by run id
+    run_traces: Dict[str, str]
+    # Traces in which a step was created
+    traces_with_steps: set
+    # Nearest non ignored parent of the ignored runs, by run id
+    non_ignored_parent_ids: Dict[str, Optional[str]]
+    # (payload, summary) of the payloads of a trace, by trace id then by payload id
+    payload_summaries: Dict[str, Dict[int, Tuple[Any, Any]]]
 
     def __init__(
         self,
@@ -250,6 +374,12 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
         to_ignore: Optional[List[str]] = None,
         # Runs to keep within ignored runs
         to_keep: Optional[List[str]] = None,
+        # Maximum number of runs to keep in memory
+        max_tracked_runs: int = DEFAULT_MAX_TRACKED_RUNS,
+        # Maximum number of characters of the input and output of a step
+        max_content_size: int = DEFAULT_MAX_CONTENT_SIZE,
+        # Maximum number of characters of the content of a document
+        max_document_size: int = DEFAULT_MAX_DOCUMENT_SIZE,
         **kwargs: Any,
     ) -> None:
         BaseTracer.__init__(self, **kwargs)
@@ -261,9 +391,20 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
             force_stream_final_answer=force_stream_final_answer,
         )
         self.context = context_var.get()
+        self.events = TracerEventQueue(self.context)
         self.steps = {}
         self.parent_id_map = {}
         self.ignored_runs = set()
+        self.run_parents = OrderedDict()
+        self.live_children = {}
+        self.ended_runs = set()
+        self.run_traces = {}
+        self.traces_with_steps = set()
+        self.non_ignored_parent_ids = {}
+        self.payload_summaries = {}
+        self.max_tracked_runs = max_tracked_runs
+        self.max_content_size = max_content_size
+        self.max_document_size = max_document_size
 
         if self.context.current_step:
             self.root_parent_id = self.context.current_step.id
@@ -282,6 +423,30 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
         else:
             self.to_keep = to_keep
 
+    @property
+    def to_ignore(self) -> List[str]:
+        return self._to_ignore
+
+    @to_ignore.setter
+    def to_ignore(self, to_ignore: List[str]):
+        self._to_ignore = to_ignore
+        # A single pattern matching any of the substrings to ignore
+        self._ignore_pattern = (
+            re.compile("|".join(re.escape(filter) for filter in to_ignore))
+            if to_ignore
+            else None
+        )  # type: Optional[Pattern[str]]
+        self._ignored_names = {}  # type: Dict[str, bool]
+
+    @property
+    def to_keep(self) -> List[str]:
+        return self._to_keep
+
+    @to_keep.setter
+    def to_keep(self, to_keep: List[str]):
+        self._to_keep = to_keep
+        self._run_types_to_keep = frozenset(to_keep)  # type: FrozenSet[str]
+
     def on_chat_model_start(
         self,
         serialized: Dict[str, Any],
@@ -349,6 +514,9 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
         parent_run_id: Optional["UUID"] = None,
         **kwargs: Any,
     ) -> Run:
+        if str(run_id) in self.run_parents:
+            self.run_parents.move_to_end(str(run_id))
+
         if isinstance(chunk, ChatGenerationChunk):
             start = self.chat_generations[str(run_id)]
         else:
@@ -363,8 +531,8 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
             if self.answer_reached:
                 if not self.final_stream:
                     self.final_stream = Message(content="")
-                    self._run_sync(self.final_stream.send())
-                self._run_sync(self.final_stream.stream_token(token))
+                    self.events.put("send", self.final_stream)
+                self.events.put("token", self.final_stream, token)
                 self.has_streamed_final_answer = True
             else:
                 self.answer_reached = self._check_if_answer_reached()
@@ -376,9 +544,9 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
             parent_run_id=parent_run_id,
         )
 
-    def _run_sync(self, co):  # TODO: WHAT TO DO WITH THIS?
-        context_var.set(self.context)
-        self.context.loop.create_task(co)
+    async def flush(self):
+        """Wait until the steps and tokens of the traced runs are sent to the UI."""
+        await self.events.flush()
 
     def _persist_run(self, run: Run) -> None:
         pass
@@ -395,14 +563,37 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
         if current_parent_id not in self.parent_id_map:
             return None
 
+        # Ignored runs walked through, they share the same non ignored parent
+        ignored_ids = []
+        non_ignored_parent_id = self.root_parent_id
         while current_parent_id in self.parent_id_map:
+            if current_parent_id in self.non_ignored_parent_ids:
+                non_ignored_parent_id = self.non_ignored_parent_ids[current_parent_id]
+                break
             # If the parent id is in the ignored runs, we need to get the parent id of the ignored run
             if current_parent_id in self.ignored_runs:
+                ignored_ids.append(current_parent_id)
                 current_parent_id = self.parent_id_map[current_parent_id]
             else:
-                return current_parent_id
+                non_ignored_parent_id = current_parent_id
+                break
+
+        for ignored_id in ignored_ids:
+            self.non_ignored_parent_ids[ignored_id] = non_ignored_parent_id
+
+        return non_ignored_parent_id
+
+    def _is_ignored_name(self, name: str) -> bool:
+        if self._ignore_pattern is None:
+            return False
 
-        return self.root_parent_id
+        ignored = self._ignored_names.get(name)
+        if ignored is None:
+            if len(self._ignored_names) >= MAX_MEMOISED_RUN_NAMES:
+                self._ignored_names.clear()
+            ignored = self._ignore_pattern.search(name) is not None
+            self._ignored_names[name] = ignored
+        return ignored
 
     def _should_ignore_run(self, run: Run):
         parent_id = self._get_run_parent_id(run)
@@ -412,18 +603,17 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
             # so we can re-attach a kept child to the right parent id
             self.parent_id_map[str(run.id)] = parent_id
 
-        ignore_by_name = False
+        ignore_by_name = self._is_ignored_name(run.name)
         ignore_by_parent = parent_id in self.ignored_runs
 
-        for filter in self.to_ignore:
-            if filter in run.name:
-                ignore_by_name = True
-                break
-
         ignore = ignore_by_name or ignore_by_parent
 
         # If the ignore cause is the parent being ignored, check if we should nonetheless keep the child
-        if ignore_by_parent and not ignore_by_name and run.run_type in self.to_keep:
+        if (
+            ignore_by_parent
+            and not ignore_by_name
+            and run.run_type in self._run_types_to_keep
+        ):
             return False, self._get_non_ignored_parent_id(parent_id)
         else:
             if ignore:
@@ -431,19 +621,138 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
                 self.ignored_runs.add(str(run.id))
             return ignore, parent_id
 
+    def _track_run(self, run: Run):
+        run_id = str(run.id)
+        parent_run_id = str(run.parent_run_id) if run.parent_run_id else None
+        self.run_parents[run_id] = parent_run_id
+        self.run_traces[run_id] = self.run_traces.get(parent_run_id or "", run_id)
+        if parent_run_id is not None and parent_run_id in self.run_parents:
+            self.live_children[parent_run_id] = (
+                self.live_children.get(parent_run_id, 0) + 1
+            )
+
+        # Evict the least recently active runs, they most likely never ended
+        while len(self.run_parents) > self.max_tracked_runs:
+            orphan_id, _ = self.run_parents.popitem(last=False)
+            self.live_children.pop(orphan_id, None)
+            self.ended_runs.discard(orphan_id)
+            self.run_map.pop(orphan_id, None)
+            self._forget_run(orphan_id)
+
+    def _forget_run(self, run_id: str):
+        # Only recent langchain versions map the runs to their trace
+        if order_map := getattr(self, "order_map", None):
+            order_map.pop(UUID(run_id), None)
+        self.run_traces.pop(run_id, None)
+        self.traces_with_steps.discard(run_id)
+        self.steps.pop(run_id, None)
+        self.parent_id_map.pop(run_id, None)
+        self.ignored_runs.discard(run_id)
+        self.non_ignored_parent_ids.pop(run_id, None)
+        self.generation_inputs.pop(run_id, None)
+        # The root run of a trace is released last
+        self.payload_summaries.pop(run_id, None)
+        self.chat_generations.pop(run_id, None)
+        self.completion_generations.pop(run_id, None)
+
+    def _release_run(self, run_id: str):
+        """Release the state of an ended run, once all of its children ended."""
+        current_id: Optional[str] = run_id
+        while current_id is not None:
+            if self.live_children.get(current_id):
+                # Its children still need to find their parent
+                self.ended_runs.add(current_id)
+                return
+
+            self.live_children.pop(current_id, None)
+            self.ended_runs.discard(current_id)
+            self._forget_run(current_id)
+            parent_run_id = self.run_parents.pop(current_id, None)
+
+            if parent_run_id is None or parent_run_id not in self.live_children:
+                return
+            self.live_children[parent_run_id] -= 1
+            if (
+                self.live_children[parent_run_id]
+                or parent_run_id not in self.ended_runs
+            ):
+                return
+            current_id = parent_run_id
+
+    def _truncate(self, text: str, max_size: int) -> str:
+        if 0 < max_size < len(text):
+            return text[:max_size] + TRUNCATED_CONTENT
+        return text
+
+    def _summarize(self, payload: Any, run_id: str) -> Any:
+        """
+        Summarize the documents and truncate the long strings of a payload of a run.
+        Payloads passed from run to run within a trace are summarized once, and
+        are returned as is when there is nothing to summarize.
+        """
+        trace_id = self.run_traces.get(run_id)
+        if trace_id is not None and trace_id in self.run_traces:
+            summaries = self.payload_summaries.setdefault(trace_id, {})
+        else:
+            # The root run is released, memoised summaries would never be dropped
+            summaries = {}
+        return self._summarize_payload(payload, summaries, 0)
+
+    def _summarize_payload(
+        self, payload: Any, summaries: Dict[int, Tuple[Any, Any]], depth: int
+    ) -> Any:
+        if isinstance(payload, str):
+            return self._truncate(payload, self.max_content_size)
+        if not isinstance(payload, (dict, list, tuple, Document)):
+            return payload
+        if depth >= MAX_CONTENT_DEPTH:
+            return TRUNCATED_CONTENT
+
+        key = id(payload)
+        if key in summaries:
+            return summaries[key][1]
+
+        summary: Any
+        if isinstance(payload, Document):
+            summary = {
+                "page_content": self._truncate(
+                    payload.page_content, self.max_document_size
+                ),
+                "metadata": self._summarize_payload(
+                    payload.metadata, summaries, depth + 1
+                ),
+            }
+        elif isinstance(payload, dict):
+            values = {
+                name: self._summarize_payload(value, summaries, depth + 1)
+                for name, value in payload.items()
+            }
+            changed = any(values[name] is not payload[name] for name in payload)
+            summary = values if changed else payload
+        else:
+            items = [
+                self._summarize_payload(item, summaries, depth + 1) for item in payload
+            ]
+            changed = any(new is not old for new, old in zip(items, payload))
+            summary = items if changed else payload
+
+        # Keep the payload so that its id is not reused while the trace is tracked
+        summaries[key] = (payload, summary)
+        return summary
+
     def _is_annotable(self, run: Run):
         return run.run_type in ["retriever", "llm"]
 
     def _start_trace(self, run: Run) -> None:
         super()._start_trace(run)
         context_var.set(self.context)
+        self._track_run(run)
 
         ignore, parent_id = self._should_ignore_run(run)
 
         if run.run_type in ["chain", "prompt"]:
-            self.generation_inputs[str(run.id)] = self.ensure_values_serializable(
-                run.inputs
-            )
+            # Serialized if a child generation uses them as variables
+            self.generation_inputs[str(run.id)] = run.inputs
 
         if ignore:
             return
@@ -462,7 +771,10 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
         elif run.run_type == "embedding":
             step_type = "embedding"
 
-        if not self.steps:
+        # The first step of a trace is the run
+        trace_id = self.run_traces.get(str(run.id), str(run.id))
+        if trace_id not in self.traces_with_steps:
+            self.traces_with_steps.add(trace_id)
             step_type = "run"
 
         disable_feedback = not self._is_annotable(run)
@@ -473,13 +785,19 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
             type=step_type,
             parent_id=parent_id,
             disable_feedback=disable_feedback,
+            max_content_size=self.max_content_size,
         )
         step.start = utc_now()
-        step.input = run.inputs
+        # Serialized when the step is sent
+        step.input = self._summarize(run.inputs, str(run.id))
 
         self.steps[str(run.id)] = step
 
-        self._run_sync(step.send())
+        self.events.put("send", step)
+
+    def _end_trace(self, run: Run) -> None:
+        super()._end_trace(run)
+        self._release_run(str(run.id))
 
     def _on_run_update(self, run: Run) -> None:
         """Process a run upon update."""
@@ -498,7 +816,12 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
             )
             generations = (run.outputs or {}).get("generations", [])
             generation = generations[0][0]
-            variables = self.generation_inputs.get(str(run.parent_run_id), {})
+            variables = self.ensure_values_serializable(
+                self._summarize(
+                    self.generation_inputs.get(str(run.parent_run_id), {}),
+                    str(run.id),
+                )
+            )
             if message := generation.get("message"):
                 chat_start = self.chat_generations[str(run.id)]
                 duration = time.time() - chat_start["start"]
@@ -557,10 +880,10 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
 
             if current_step:
                 current_step.end = utc_now()
-                self._run_sync(current_step.update())
+                self.events.put("update", current_step)
 
             if self.final_stream and self.has_streamed_final_answer:
-                self._run_sync(self.final_stream.update())
+                self.events.put("update", self.final_stream)
 
             return
 
@@ -571,9 +894,9 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
             output = outputs.get(output_keys[0], outputs)
 
         if current_step:
-            current_step.output = output
+            current_step.output = self._summarize(output, str(run.id))
             current_step.end = utc_now()
-            self._run_sync(current_step.update())
+            self.events.put("update", current_step)
 
     def _on_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
         context_var.set(self.context)
@@ -582,7 +905,10 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
             current_step.is_error = True
             current_step.output = str(error)
             current_step.end = utc_now()
-            self._run_sync(current_step.update())
+            self.events.put("update", current_step)
+
+        self.run_map.pop(str(run_id), None)
+        self._release_run(str(run_id))
 
     on_llm_error = _on_error
     on_chain_error = _on_error
@@ -590,5 +916,123 @@ class LangchainTracer(BaseTracer, GenerationHelper, FinalStreamHelper):
     on_retriever_error = _on_error
 
 
+class AsyncLangchainTracer(LangchainTracer):
+    """
+    LangChain tracer for async chains.
+
+    LangChain runs the callbacks of a sync handler in a worker thread when the
+    chain is async. The callbacks of this tracer are coroutines awaited by the
+    chain on the event loop: the steps and tokens are sent before the chain
+    goes on, without thread hop nor task. Used with a sync chain, its events
+    are sent by a drain task like the sync tracer.
+    """
+
+    run_inline = True
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.events = TracerEventQueue(self.context, inline=True)
+
+    async def on_chat_model_start(  # type: ignore[override]
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        **kwargs: Any,
+    ) -> None:
+        try:
+            super().on_chat_model_start(serialized, messages, **kwargs)
+        except NotImplementedError:
+            # Trace the chat model as an llm, as the LangChain callback manager
+            # does, but it can't for the coroutines of a sync chain
+            super().on_llm_start(
+                serialized, [get_buffer_string(m) for m in messages], **kwargs
+            )
+        await self.events.process()
+
+    async def on_llm_start(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_llm_start(*args, **kwargs)
+        await self.events.process()
+
+    async def on_llm_new_token(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_llm_new_token(*args, **kwargs)
+        await self.events.process()
+
+    async def on_llm_end(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_llm_end(*args, **kwargs)
+        await self.events.process()
+
+    async def on_llm_error(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_llm_error(*args, **kwargs)
+        await self.events.process()
+
+    async def on_chain_start(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_chain_start(*args, **kwargs)
+        await self.events.process()
+
+    async def on_chain_end(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_chain_end(*args, **kwargs)
+        await self.events.process()
+
+    async def on_chain_error(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_chain_error(*args, **kwargs)
+        await self.events.process()
+
+    async def on_tool_start(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_tool_start(*args, **kwargs)
+        await self.events.process()
+
+    async def on_tool_end(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_tool_end(*args, **kwargs)
+        await self.events.process()
+
+    async def on_tool_error(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_tool_error(*args, **kwargs)
+        await self.events.process()
+
+    async def on_retriever_start(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_retriever_start(*args, **kwargs)
+        await self.events.process()
+
+    async def on_retriever_end(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_retriever_end(*args, **kwargs)
+        await self.events.process()
+
+    async def on_retriever_error(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_retriever_error(*args, **kwargs)
+        await self.events.process()
+
+    async def on_retry(  # type: ignore[override]
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        super().on_retry(*args, **kwargs)
+        await self.events.process()
+
+
 LangchainCallbackHandler = LangchainTracer
-AsyncLangchainCallbackHandler = LangchainTracer
+AsyncLangchainCallbackHandler = AsyncLangchainTracer
@@ -1,10 +1,15 @@
-from typing import Any, Dict, List, Optional
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
+from chainlit.clock import utc_now
 from chainlit.context import context_var
 from chainlit.element import Text
 from chainlit.step import Step, StepType
+from chainlit.sync import make_async
 from literalai import ChatGeneration, CompletionGeneration, GenerationMessage
-from literalai.helper import utc_now
 from llama_index.core.callbacks import TokenCountingHandler
 from llama_index.core.callbacks.schema import CBEventType, EventPayload
 from llama_index.core.llms import ChatMessage, ChatResponse, CompletionResponse
@@ -17,6 +22,11 @@ DEFAULT_IGNORE = [
     CBEventType.TREE,
 ]
 
+# Directory of the session files where the source node texts are stored
+SOURCES_DIRECTORY_NAME = "sources"
+# Characters of a source node shown in the step output
+SOURCE_PREVIEW_SIZE = 100
+
 
 class LlamaIndexCallbackHandler(TokenCountingHandler):
     """Base callback handler that can be used to track event starts and ends."""
@@ -60,6 +70,75 @@ class LlamaIndexCallbackHandler(TokenCountingHandler):
         """
         context_var.set(self.context)
 
+    def _get_source_element(
+        self, name: str, text: str, new_sources: Dict[Path, bytes]
+    ) -> Text:
+        """
+        Text element of a source node, identified by the hash of its text. The
+        data layers store the texts sharing a hash once. The texts are written
+        once per session for the UI, which fetches them when the element is
+        opened, the new ones are added to `new_sources` to be written.
+        """
+        content = text.encode("utf-8")
+        content_hash = hashlib.sha256(content).hexdigest()
+        session = self.context.session
+        if content_hash not in session.files:
+            path = session.files_dir / SOURCES_DIRECTORY_NAME / f"{content_hash}.txt"
+            new_sources[path] = content
+            session.files[content_hash] = {
+                "id": content_hash,
+                "path": path,
+                "name": path.name,
+                "type": "text/plain",
+                "size": len(content),
+            }
+
+        return Text(
+            name=name,
+            content=text,
+            chainlit_key=content_hash,
+            content_key=content_hash,
+            display="side",
+            mime="text/plain",
+        )
+
+    def _set_sources(
+        self, step: Step, sources: List[Tuple[str, str]]
+    ) -> Dict[Path, bytes]:
+        """
+        Attach the (node id, text) sources to the step and preview them.
+        Return the texts to write to the session files.
+        """
+        new_sources: Dict[Path, bytes] = {}
+        step.elements = []
+        previews = []
+        for idx, (node_id, text) in enumerate(sources):
+            name = f"Source {idx}"
+            text = text or "Empty node"
+            step.elements.append(self._get_source_element(name, text, new_sources))
+            preview = " ".join(text[:SOURCE_PREVIEW_SIZE].split())
+            if len(text) > SOURCE_PREVIEW_SIZE:
+                preview += "..."
+            previews.append(f"- {name} (node {node_id}): {preview}")
+
+        step.output = "Retrieved the following sources:\n" + "\n".join(previews)
+        return new_sources
+
+    @staticmethod
+    def _write_sources(sources: Dict[Path, bytes]) -> None:
+        for path, content in sources.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file so that the file is never read partially
+            tmp_path = path.with_suffix(f".{uuid.uuid4()}.tmp")
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, path)
+
+    async def _update_sources_step(self, step: Step, sources: Dict[Path, bytes]):
+        # The callbacks can run on the event loop, the files are written in a thread
+        if sources:
+            await make_async(self._write_sources)(sources)
+        await step.update()
+
     def on_event_start(
         self,
         event_type: CBEventType,
@@ -115,36 +194,26 @@ class LlamaIndexCallbackHandler(TokenCountingHandler):
             response = payload.get(EventPayload.RESPONSE)
             source_nodes = getattr(response, "source_nodes", None)
             if source_nodes:
-                source_refs = ", ".join(
-                    [f"Source {idx}" for idx, _ in enumerate(source_nodes)]
+                new_sources = self._set_sources(
+                    step,
+                    [(source.node.node_id, source.text) for source in source_nodes],
+                )
+                self.context.loop.create_task(
+                    self._update_sources_step(step, new_sources)
                 )
-                step.elements = [
-                    Text(
-                        name=f"Source {idx}",
-                        content=source.text or "Empty node",
-                        display="side",
-                    )
-                    for idx, source in enumerate(source_nodes)
-                ]
-                step.output = f"Retrieved the following sources: {source_refs}"
-                self.context.loop.create_task(step.update())
 
         elif event_type == CBEventType.RETRIEVE:
             sources = payload.get(EventPayload.NODES)
+            new_sources = {}
             if sources:
-                source_refs = ", ".join(
-                    [f"Source {idx}" for idx, _ in enumerate(sources)]
+                new_sources = self._set_sources(
+                    step,
+                    [
+                        (source.node.node_id, source.node.get_text())
+                        for source in sources
+                    ],
                 )
-                step.elements = [
-                    Text(
-                        name=f"Source {idx}",
-                        display="side",
-                        content=source.node.get_text() or "Empty node",
-                    )
-                    for idx, source in enumerate(sources)
-                ]
-                step.output = f"Retrieved the following sources: {source_refs}"
-            self.context.loop.create_task(step.update())
+            self.context.loop.create_task(self._update_sources_step(step, new_sources))
 
         elif event_type == CBEventType.LLM:
             formatted_messages = payload.get(
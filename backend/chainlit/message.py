@@ -1,17 +1,24 @@
 import asyncio
 import json
-import time
 import uuid
 from abc import ABC
 from typing import Dict, List, Optional, Union, cast
 
 from chainlit.action import Action
+from chainlit.batch import current_batch
+from chainlit.clock import utc_now
 from chainlit.config import config
-from chainlit.context import context
+from chainlit.context import get_context
 from chainlit.data import get_data_layer
 from chainlit.element import ElementBased
 from chainlit.logger import logger
-from chainlit.step import StepDict
+from chainlit.step import (
+    StepDict,
+    StreamBuffer,
+    get_step_changes,
+    has_step_changes,
+    snapshot_step_dict,
+)
 from chainlit.telemetry import trace_event
 from chainlit.types import (
     AskActionResponse,
@@ -22,7 +29,6 @@ from chainlit.types import (
     FileDict,
 )
 from literalai import BaseGeneration
-from literalai.helper import utc_now
 from literalai.step import MessageStepType
 
 
@@ -30,7 +36,6 @@ class MessageBase(ABC):
     id: str
     thread_id: str
     author: str
-    content: str = ""
     type: MessageStepType = "assistant_message"
     disable_feedback = False
     streaming = False
@@ -44,10 +49,26 @@ class MessageBase(ABC):
     wait_for_answer = False
     indent: Optional[int] = None
     generation: Optional[BaseGeneration] = None
+    # Delay (in seconds) during which successive updates are sent at once
+    update_debounce: float = 0
+
+    _content = None  # type: Optional[StreamBuffer]
+    # Last step dict sent to the UI, to only send the changed fields on update
+    _last_dict = None  # type: Optional[StepDict]
+    # Pending debounced update
+    _update_task = None  # type: Optional[asyncio.Task]
+
+    @property
+    def content(self) -> str:
+        return self._content.text if self._content else ""
+
+    @content.setter
+    def content(self, content: str):
+        self._content = StreamBuffer(content)
 
     def __post_init__(self) -> None:
         trace_event(f"init {self.__class__.__name__}")
-        self.thread_id = context.session.thread_id
+        self.thread_id = get_context().session.thread_id
 
         if not getattr(self, "id", None):
             self.id = str(uuid.uuid4())
@@ -96,24 +117,62 @@ class MessageBase(ABC):
     ):
         """
         Update a message already sent to the UI.
+        Only the fields changed since the message was sent are sent to the UI.
+        If `update_debounce` is set, the updates made within this delay are sent at once.
         """
+        if self.update_debounce > 0:
+            if not self._update_task:
+                self._update_task = asyncio.create_task(self._debounced_update())
+            return True
+
+        return await self._send_update()
+
+    async def _debounced_update(self):
+        await asyncio.sleep(self.update_debounce)
+        self._update_task = None
+        await self._send_update()
+
+    def _cancel_pending_update(self) -> bool:
+        if not self._update_task:
+            return False
+        self._update_task.cancel()
+        self._update_task = None
+        return True
+
+    async def flush_update(self):
+        """Send the pending debounced update now."""
+        if self._cancel_pending_update():
+            await self._send_update()
+
+    async def _send_update(self):
         trace_event("update_message")
 
         if self.streaming:
             self.streaming = False
 
         step_dict = self.to_dict()
+        changes = get_step_changes(step_dict, self._last_dict)
+        self._last_dict = snapshot_step_dict(step_dict)
+        if not has_step_changes(changes):
+            return True
 
         data_layer = get_data_layer()
         if data_layer:
+            batch = current_batch.get()
             try:
-                asyncio.create_task(data_layer.update_step(step_dict))
+                # A message waiting to be created by the current batch is created updated
+                if not (batch and batch.persist_update(step_dict)):
+                    asyncio.create_task(
+                        data_layer.update_step(
+                            changes if data_layer.partial_step_updates else step_dict
+                        )
+                    )
             except Exception as e:
                 if self.fail_on_persist_error:
                     raise e
                 logger.error(f"Failed to persist message update: {str(e)}")
 
-        await context.emitter.update_step(step_dict)
+        await get_context().emitter.patch_step(step_dict, changes)
 
         return True
 
@@ -122,6 +181,7 @@ class MessageBase(ABC):
         Remove a message already sent to the UI.
         """
         trace_event("remove_message")
+        self._cancel_pending_update()
 
         step_dict = self.to_dict()
         data_layer = get_data_layer()
@@ -133,16 +193,20 @@ class MessageBase(ABC):
                     raise e
                 logger.error(f"Failed to persist message deletion: {str(e)}")
 
-        await context.emitter.delete_step(step_dict)
+        await get_context().emitter.delete_step(step_dict)
 
         return True
 
     async def _create(self):
         step_dict = self.to_dict()
+        self._last_dict = snapshot_step_dict(step_dict)
         data_layer = get_data_layer()
         if data_layer and not self.persisted:
             try:
-                asyncio.create_task(data_layer.create_step(step_dict))
+                if batch := current_batch.get():
+                    batch.persist_step(step_dict.copy())
+                else:
+                    asyncio.create_task(data_layer.create_step(step_dict))
                 self.persisted = True
             except Exception as e:
                 if self.fail_on_persist_error:
@@ -152,6 +216,8 @@ class MessageBase(ABC):
         return step_dict
 
     async def send(self):
+        # The whole message is sent, the pending update is no longer needed
+        self._cancel_pending_update()
         if not self.created_at:
             self.created_at = utc_now()
         if self.content is None:
@@ -164,7 +230,7 @@ class MessageBase(ABC):
             self.streaming = False
 
         step_dict = await self._create()
-        await context.emitter.send_step(step_dict)
+        await get_context().emitter.send_step(step_dict)
 
         return self
 
@@ -174,20 +240,23 @@ class MessageBase(ABC):
         Once all tokens have been streamed, call .send() to end the stream and persist the message if persistence is enabled.
         """
 
+        emitter = get_context().emitter
+
         if not self.streaming:
             self.streaming = True
             step_dict = self.to_dict()
-            await context.emitter.stream_start(step_dict)
+            self._last_dict = snapshot_step_dict(step_dict)
+            await emitter.stream_start(step_dict)
 
         if is_sequence:
             self.content = token
+        elif isinstance(token, str) and self._content:
+            self._content.append(token)
         else:
             self.content += token
 
         assert self.id
-        await context.emitter.send_token(
-            id=self.id, token=token, is_sequence=is_sequence
-        )
+        await emitter.send_token(id=self.id, token=token, is_sequence=is_sequence)
 
 
 class Message(MessageBase):
@@ -201,6 +270,7 @@ class Message(MessageBase):
         actions (List[Action], optional): A list of actions to send with the message.
         elements (List[ElementBased], optional): A list of elements to send with the message.
         disable_feedback (bool, optional): Hide the feedback buttons for this specific message
+        update_debounce (float, optional): Delay (in seconds) during which successive calls to update() are sent at once. Defaults to 0 (disabled).
     """
 
     def __init__(
@@ -217,9 +287,10 @@ class Message(MessageBase):
         tags: Optional[List[str]] = None,
         id: Optional[str] = None,
         created_at: Union[str, None] = None,
+        update_debounce: float = 0,
     ):
-        time.sleep(0.001)
         self.language = language
+        self.update_debounce = update_debounce
         self.generation = generation
         if isinstance(content, dict):
             try:
@@ -259,7 +330,7 @@ class Message(MessageBase):
         trace_event("send_message")
         await super().send()
 
-        context.session.root_message = self
+        get_context().session.root_message = self
 
         # Create tasks for all actions and elements
         tasks = [action.send(for_id=self.id) for action in self.actions]
@@ -335,7 +406,7 @@ class AskMessageBase(MessageBase):
     async def remove(self):
         removed = await super().remove()
         if removed:
-            await context.emitter.clear("clear_ask")
+            await get_context().emitter.clear("clear_ask")
 
 
 class AskUserMessage(AskMessageBase):
@@ -392,7 +463,9 @@ class AskUserMessage(AskMessageBase):
 
         res = cast(
             Union[None, StepDict],
-            await context.emitter.send_ask_user(step_dict, spec, self.raise_on_timeout),
+            await get_context().emitter.send_ask_user(
+                step_dict, spec, self.raise_on_timeout
+            ),
         )
 
         self.wait_for_answer = False
@@ -470,7 +543,9 @@ class AskFileMessage(AskMessageBase):
 
         res = cast(
             Union[None, List[FileDict]],
-            await context.emitter.send_ask_user(step_dict, spec, self.raise_on_timeout),
+            await get_context().emitter.send_ask_user(
+                step_dict, spec, self.raise_on_timeout
+            ),
         )
 
         self.wait_for_answer = False
@@ -543,7 +618,9 @@ class AskActionMessage(AskMessageBase):
 
         res = cast(
             Union[AskActionResponse, None],
-            await context.emitter.send_ask_user(step_dict, spec, self.raise_on_timeout),
+            await get_context().emitter.send_ask_user(
+                step_dict, spec, self.raise_on_timeout
+            ),
         )
 
         for action in self.actions:
@@ -0,0 +1,262 @@
+import bisect
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type: str
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError()
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values = {}  # type: Dict[LabelValues, float]
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            (self.name, _format_labels(self.label_names, key), value)
+            for key, value in items
+        ]
+
+
+class Gauge(Metric):
+    """A value that goes up and down. If a callback is provided, it is read at scrape time."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+        self._values = {}  # type: Dict[LabelValues, float]
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[self._label_values(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.callback:
+            return [(self.name, "", self.callback())]
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            (self.name, _format_labels(self.label_names, key), value)
+            for key, value in items
+        ]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: count of each bucket (non cumulative), sum, count
+        self._values = {}  # type: Dict[LabelValues, Tuple[List[int], List[float]]]
+
+    def observe(self, value: float, **labels: str):
+        key = self._label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+            counts, totals = self._values[key]
+            counts[index] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def time(self, **labels: str):
+        """Decorate a coroutine function to observe its duration."""
+
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.monotonic()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.observe(time.monotonic() - start, **labels)
+
+            return wrapper
+
+        return decorator
+
+    def samples(self):
+        with self._lock:
+            items = [
+                (key, list(counts), list(totals))
+                for key, (counts, totals) in self._values.items()
+            ]
+
+        samples = []
+        label_names = self.label_names + ("le",)
+        for key, counts, (total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(label_names, key + (_format_value(bound),))
+                samples.append((f"{self.name}_bucket", labels, cumulative))
+            labels = _format_labels(self.label_names, key)
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    In-process metrics, rendered in the Prometheus text format on /metrics.
+    No external service or client library is needed.
+    """
+
+    def __init__(self):
+        self._metrics = {}  # type: Dict[str, Metric]
+
+    def register(self, metric: Metric):
+        # Keep the first registration, modules can be reloaded in watch mode
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None,
+    ):
+        return self.register(Gauge(name, documentation, labels, callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+socket_handler_duration = registry.histogram(
+    "chainlit_socket_handler_duration_seconds",
+    "Duration of the websocket event handlers.",
+    labels=("event",),
+)
+http_request_duration = registry.histogram(
+    "chainlit_http_request_duration_seconds",
+    "Duration of the HTTP requests.",
+    labels=("method", "route", "status"),
+)
+message_duration = registry.histogram(
+    "chainlit_message_duration_seconds",
+    "Duration of the processing of a user message.",
+)
+message_queue_wait = registry.histogram(
+    "chainlit_message_queue_wait_seconds",
+    "Time spent by a user message waiting for a processing slot.",
+)
+data_layer_duration = registry.histogram(
+    "chainlit_data_layer_duration_seconds",
+    "Duration of the data layer calls.",
+    labels=("method",),
+)
+data_layer_errors = registry.counter(
+    "chainlit_data_layer_errors_total",
+    "Number of data layer calls that raised an exception.",
+    labels=("method",),
+)
+data_layer_in_flight = registry.gauge(
+    "chainlit_data_layer_calls_in_flight",
+    "Number of data layer calls running, including fire-and-forget persistence.",
+    labels=("method",),
+)
+outbound_events_merged = registry.counter(
+    "chainlit_outbound_events_merged_total",
+    "Number of websocket events merged into a pending event of the same step.",
+)
+outbound_events_dropped = registry.counter(
+    "chainlit_outbound_events_dropped_total",
+    "Number of websocket events dropped because superseded by a later update.",
+)
+audio_chunks_dropped = registry.counter(
+    "chainlit_audio_chunks_dropped_total",
+    "Number of audio chunks dropped, because the buffer overflowed or they arrived late.",
+    labels=("reason",),
+)
@@ -0,0 +1,246 @@
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from chainlit.logger import logger
+from chainlit.metrics import outbound_events_dropped, outbound_events_merged
+
+# Events carrying the changed fields of a step, a later one supersedes the
+# same fields of the pending updates and tokens of the step
+SUPERSEDING_EVENTS = ("update_message",)
+
+# Number of packets buffered by the transport above which we stop draining
+TRANSPORT_HIGH_WATER_MARK = 64
+# Interval (in seconds) at which the transport buffer is polled when above the mark
+TRANSPORT_POLL_INTERVAL = 0.01
+
+OutboundEvent = Tuple[str, Any]
+# Event already sent, with its sequence number
+SentEvent = Tuple[int, str, Any]
+
+
+def _event_step_id(data: Any) -> Optional[str]:
+    if isinstance(data, dict):
+        return data.get("id")
+    return None
+
+
+class OutboundQueue:
+    """
+    Bounded queue of the events emitted to a websocket client.
+
+    A single task drains the queue so that the events are sent in order.
+    Consecutive stream tokens and updates of the same step are merged while
+    they wait in the queue. When the queue is full, updates and tokens
+    superseded by a later update are dropped, and if there is still no room
+    the producer waits for the client to catch up.
+
+    Each event is sent with a sequence number and the last `replay_size`
+    events are kept, so that a reconnecting client can get the events it
+    missed (see `replay`).
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, Any, int], Awaitable[Any]],
+        max_size: int,
+        transport_backlog: Optional[Callable[[], int]] = None,
+        replay_size: int = 0,
+    ):
+        self.send = send
+        self.max_size = max(max_size, 1)
+        self.transport_backlog = transport_backlog
+
+        self.items = deque()  # type: Deque[OutboundEvent]
+
+        # Sequence number of the last event sent
+        self.sequence = 0
+        self.history = deque(maxlen=max(replay_size, 0))  # type: Deque[SentEvent]
+        # Events to send again, before the queued ones
+        self._replay = deque()  # type: Deque[SentEvent]
+
+        self.sent_count = 0
+        self.merged_count = 0
+        self.dropped_count = 0
+        self.max_depth = 0
+
+        self._drain_task = None  # type: Optional[asyncio.Task]
+        # Producers waiting for room in the queue, one at a time
+        self._put_lock = asyncio.Lock()
+        self._waiting_producers = 0
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._empty = asyncio.Event()
+        self._empty.set()
+
+    @property
+    def depth(self) -> int:
+        return len(self.items)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent_count,
+            "merged": self.merged_count,
+            "dropped": self.dropped_count,
+            "sequence": self.sequence,
+        }
+
+    async def put(self, event: str, data: Any):
+        """Queue an event for the client."""
+        if not self._waiting_producers:
+            if self._merge(event, data):
+                self._count_merged()
+                return
+            if len(self.items) < self.max_size:
+                self._append(event, data)
+                return
+
+        # Producers waiting for room are served in order, so that a later
+        # token is not merged into the queue before an earlier waiting one
+        self._waiting_producers += 1
+        try:
+            async with self._put_lock:
+                while len(self.items) >= self.max_size:
+                    self._drop_superseded()
+                    if len(self.items) < self.max_size:
+                        break
+                    self._not_full.clear()
+                    await self._not_full.wait()
+
+                if self._merge(event, data):
+                    self._count_merged()
+                else:
+                    self._append(event, data)
+        finally:
+            self._waiting_producers -= 1
+
+    def _append(self, event: str, data: Any):
+        self.items.append((event, data))
+        self.max_depth = max(self.max_depth, len(self.items))
+        self._start_draining()
+
+    def replay(self, last_sequence: int) -> bool:
+        """
+        Send again the events sent after `last_sequence`, the last one received by the client.
+        Return False if some of them are no longer kept.
+        """
+        missed = [sent for sent in self.history if sent[0] > last_sequence]
+        if missed:
+            self._replay.extend(missed)
+            self._start_draining()
+
+        first_missed = missed[0][0] if missed else self.sequence + 1
+        return first_missed == last_sequence + 1
+
+    def _start_draining(self):
+        self._empty.clear()
+        if not self._drain_task:
+            self._drain_task = asyncio.create_task(self._drain())
+
+    async def join(self):
+        """Wait until every queued event has been handed to the transport."""
+        await self._empty.wait()
+
+    def close(self):
+        """Discard the pending events and stop draining."""
+        self.items.clear()
+        self._replay.clear()
+        if self._drain_task:
+            self._drain_task.cancel()
+            self._drain_task = None
+        self._not_full.set()
+        self._empty.set()
+
+    def _merge(self, event: str, data: Any) -> bool:
+        """Merge the event into the last pending event if they target the same step."""
+        if not self.items:
+            return False
+
+        last_event, last_data = self.items[-1]
+        step_id = _event_step_id(data)
+        if last_event != event or not step_id or _event_step_id(last_data) != step_id:
+            return False
+
+        if event == "stream_token":
+            if data.get("isSequence"):
+                merged = data
+            else:
+                merged = dict(last_data, token=last_data["token"] + data["token"])
+            self.items[-1] = (event, merged)
+            return True
+        elif event == "update_message":
+            # Updates only carry the changed fields, the later ones win
+            self.items[-1] = (event, dict(last_data, **data))
+            return True
+
+        return False
+
+    def _drop_superseded(self):
+        # Latest kept update of each step, the earlier updates are merged into it
+        later_updates = {}  # type: Dict[str, Dict]
+        kept = deque()  # type: Deque[OutboundEvent]
+
+        # Walk backward so that the latest update of a step is kept
+        for event, data in reversed(self.items):
+            step_id = _event_step_id(data)
+            later_update = later_updates.get(step_id) if step_id else None
+
+            if event in SUPERSEDING_EVENTS and step_id:
+                if later_update is not None:
+                    for key, value in data.items():
+                        later_update.setdefault(key, value)
+                    self._count_dropped()
+                    continue
+                data = later_updates[step_id] = dict(data)
+            elif (
+                event == "stream_token"
+                and later_update is not None
+                and "output" in later_update
+            ):
+                self._count_dropped()
+                continue
+            elif step_id:
+                # The earlier updates can't be moved after this event
+                later_updates.pop(step_id, None)
+            kept.appendleft((event, data))
+
+        self.items = kept
+
+    def _count_merged(self):
+        self.merged_count += 1
+        outbound_events_merged.inc()
+
+    def _count_dropped(self):
+        self.dropped_count += 1
+        outbound_events_dropped.inc()
+
+    async def _wait_for_transport(self):
+        if not self.transport_backlog:
+            return
+        while self.transport_backlog() > TRANSPORT_HIGH_WATER_MARK:
+            await asyncio.sleep(TRANSPORT_POLL_INTERVAL)
+
+    async def _drain(self):
+        try:
+            while self._replay or self.items:
+                if self._replay:
+                    sequence, event, data = self._replay.popleft()
+                else:
+                    event, data = self.items.popleft()
+                    self._not_full.set()
+                    self.sequence += 1
+                    sequence = self.sequence
+                    self.history.append((sequence, event, data))
+                try:
+                    await self.send(event, data, sequence)
+                except Exception as e:
+                    logger.error(f"Failed to emit {event}: {e}")
+                self.sent_count += 1
+                # Hold the next events while the client is not reading fast enough
+                await self._wait_for_transport()
+        finally:
+            self._drain_task = None
+            if not self.items and not self._replay:
+                self._empty.set()
@@ -0,0 +1,169 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, List
+
+from chainlit.config import config
+from chainlit.metrics import message_queue_wait
+
+if TYPE_CHECKING:
+    from chainlit.session import WebsocketSession
+
+
+class TaskScheduler:
+    """
+    Schedule the processing of the user messages.
+
+    Within a session, a message received while the previous one is still
+    processed is queued, replaces the previous one or is rejected depending on
+    the `message_policy` config. Across the process, at most
+    `max_concurrent_messages` messages are processed at the same time. The
+    sessions waiting for a slot are served in a round robin fashion, so a
+    session sending a burst of messages can't starve the others.
+    """
+
+    def __init__(self):
+        # Number of messages being processed
+        self.running = 0
+        # Futures waiting for a slot, by session id
+        self.waiters = OrderedDict()  # type: OrderedDict[str, Deque[asyncio.Future]]
+        # Message tasks scheduled for each session
+        self.session_tasks = {}  # type: Dict[str, List[asyncio.Task]]
+
+        self.wait_count = 0
+        self.wait_time_sum = 0.0
+        self.wait_time_max = 0.0
+        self.rejected_count = 0
+
+    @property
+    def limit(self) -> int:
+        return config.project.max_concurrent_messages
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self.waiters.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "limit": self.limit,
+            "rejected": self.rejected_count,
+            "wait_count": self.wait_count,
+            "wait_time_sum": self.wait_time_sum,
+            "wait_time_max": self.wait_time_max,
+        }
+
+    def _has_capacity(self) -> bool:
+        return self.limit <= 0 or self.running < self.limit
+
+    def _record_wait(self, wait_time: float):
+        self.wait_count += 1
+        self.wait_time_sum += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+        message_queue_wait.observe(wait_time)
+
+    async def acquire(self, session_id: str):
+        """Wait for a processing slot."""
+        if self._has_capacity() and not self.waiters:
+            self.running += 1
+            self._record_wait(0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(session_id, deque()).append(future)
+        start = time.monotonic()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot was handed over right before the cancellation
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self._discard(session_id, future)
+            raise
+
+        self._record_wait(time.monotonic() - start)
+
+    def _discard(self, session_id: str, future: asyncio.Future):
+        waiters = self.waiters.get(session_id)
+        if waiters and future in waiters:
+            waiters.remove(future)
+            if not waiters:
+                self.waiters.pop(session_id, None)
+
+    def release(self):
+        """Free a processing slot and hand it to the next waiting session."""
+        self.running -= 1
+
+        while self.waiters and self._has_capacity():
+            session_id, waiters = self.waiters.popitem(last=False)
+            future = waiters.popleft()
+            # Move the session at the end of the line
+            if waiters:
+                self.waiters[session_id] = waiters
+            if future.done():
+                continue
+            self.running += 1
+            future.set_result(None)
+
+    async def _run(
+        self,
+        session_id: str,
+        task_factory: Callable[[], Awaitable[Any]],
+        previous_tasks: List[asyncio.Task],
+    ):
+        if previous_tasks:
+            # Wait for the previous messages of the session to be processed (or cancelled)
+            await asyncio.wait(previous_tasks)
+
+        await self.acquire(session_id)
+        try:
+            await task_factory()
+        finally:
+            self.release()
+
+    def schedule(
+        self,
+        session: "WebsocketSession",
+        task_factory: Callable[[], Awaitable[Any]],
+    ) -> bool:
+        """
+        Schedule a message task for the session.
+        Return False if the message is rejected.
+        """
+        policy = config.project.message_policy
+        previous_tasks = [
+            task for task in self.session_tasks.get(session.id, []) if not task.done()
+        ]
+
+        if previous_tasks and policy == "reject":
+            self.rejected_count += 1
+            return False
+
+        if previous_tasks and policy == "replace":
+            for previous_task in previous_tasks:
+                previous_task.cancel()
+
+        task = asyncio.create_task(self._run(session.id, task_factory, previous_tasks))
+        self.session_tasks[session.id] = previous_tasks + [task]
+        task.add_done_callback(lambda t: self._forget(session.id, t))
+
+        session.current_task = task
+        return True
+
+    def _forget(self, session_id: str, task: asyncio.Task):
+        tasks = self.session_tasks.get(session_id)
+        if tasks and task in tasks:
+            tasks.remove(task)
+        if not tasks:
+            self.session_tasks.pop(session_id, None)
+
+    def cancel(self, session_id: str):
+        """Cancel the running and queued message tasks of the session."""
+        for task in self.session_tasks.get(session_id, []):
+            task.cancel()
+
+
+scheduler = TaskScheduler()
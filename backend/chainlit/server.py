@@ -1,10 +1,12 @@
 import glob
+import hashlib
 import json
 import mimetypes
 import re
 import shutil
 import urllib.parse
-from typing import Any, Optional, Union
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple, Union
 
 from chainlit.oauth_providers import get_oauth_provider
 from chainlit.secret import random_secret
@@ -14,10 +16,13 @@ mimetypes.add_type("text/css", ".css")
 
 import asyncio
 import os
+import time
 import webbrowser
 from contextlib import asynccontextmanager
 from pathlib import Path
 
+import aiofiles
+from chainlit.admission import admission_controller, lag_monitor
 from chainlit.auth import create_jwt, get_configuration, get_current_user
 from chainlit.config import (
     APP_ROOT,
@@ -33,7 +38,10 @@ from chainlit.data import get_data_layer
 from chainlit.data.acl import is_thread_author
 from chainlit.logger import logger
 from chainlit.markdown import get_markdown_str
+from chainlit.metrics import http_request_duration, registry
 from chainlit.playground.config import get_llm_providers
+from chainlit.scheduler import scheduler
+from chainlit.session import ws_sessions_id
 from chainlit.telemetry import trace_event
 from chainlit.types import (
     DeleteFeedbackRequest,
@@ -44,6 +52,7 @@ from chainlit.types import (
     UpdateFeedbackRequest,
 )
 from chainlit.user import PersistedUser, User
+from chainlit.user_session import user_sessions
 from fastapi import (
     Depends,
     FastAPI,
@@ -54,11 +63,18 @@ from fastapi import (
     UploadFile,
     status,
 )
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    JSONResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
 from fastapi_socketio import SocketManager
-from starlette.datastructures import URL
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import URL, Headers
 from starlette.middleware.cors import CORSMiddleware
 from typing_extensions import Annotated
 from watchfiles import awatch
@@ -81,6 +97,8 @@ async def lifespan(app: FastAPI):
         await asyncio.sleep(1)
         webbrowser.open(url)
 
+    lag_monitor.start()
+
     watch_task = None
     stop_event = asyncio.Event()
 
@@ -141,6 +159,8 @@ async def lifespan(app: FastAPI):
         except asyncio.exceptions.CancelledError:
             pass
 
+        await lag_monitor.stop()
+
         if FILES_DIRECTORY.is_dir():
             shutil.rmtree(FILES_DIRECTORY)
 
@@ -198,6 +218,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def observe_request_duration(request: Request, call_next):
+    start = time.monotonic()
+    # An exception raised by a route is answered with a 500
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Use the route template as label to keep the cardinality bounded
+        route = request.scope.get("route")
+        http_request_duration.observe(
+            time.monotonic() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status_code),
+        )
+
+
 socket = SocketManager(
     app,
     cors_allowed_origins=[],
@@ -299,6 +340,163 @@ def get_user_facing_url(url: URL):
     return config_url.__str__() + url.path
 
 
+# Session files are written once under a random id and never modified
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+# Local files can change on disk, the browser has to revalidate them
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+RANGE_CHUNK_SIZE = 64 * 1024
+
+# Content hashes of local files, keyed by (path, mtime, size)
+_file_hashes: Dict[Tuple[str, int, int], str] = {}
+
+
+def _hash_file(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(RANGE_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+async def get_content_etag(path: str, stat_result: os.stat_result) -> str:
+    """Return a strong ETag derived from the file content."""
+    key = (path, stat_result.st_mtime_ns, stat_result.st_size)
+    if key not in _file_hashes:
+        # Drop the stale hashes of a file that changed on disk
+        for stale_key in [k for k in _file_hashes if k[0] == path]:
+            _file_hashes.pop(stale_key, None)
+        _file_hashes[key] = await run_in_threadpool(_hash_file, path)
+    return f'"{_file_hashes[key]}"'
+
+
+def _etag_matches(etag: str, header_value: str) -> bool:
+    if header_value.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header_value.split(",")]
+    # If-None-Match uses the weak comparison function
+    return any(c.replace("W/", "", 1) == etag for c in candidates)
+
+
+def is_not_modified(headers: Headers, etag: str, mtime: float) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the file validators."""
+    if if_none_match := headers.get("if-none-match"):
+        # If-None-Match takes precedence over If-Modified-Since
+        return _etag_matches(etag, if_none_match)
+
+    if if_modified_since := headers.get("if-modified-since"):
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+
+    return False
+
+
+def parse_range_header(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range (inclusive bounds).
+    Return None if the header should be ignored and the full file served.
+    Raise a 416 if the range can not be satisfied.
+    """
+    unit, _, ranges = range_header.partition("=")
+    # Multipart ranges are not supported, we fall back to the full content
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+
+    start_str, sep, end_str = ranges.strip().partition("-")
+    if not sep:
+        return None
+
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else file_size - 1
+        else:
+            # Suffix range: the last N bytes
+            suffix_length = int(end_str)
+            if suffix_length <= 0:
+                raise ValueError()
+            start = max(file_size - suffix_length, 0)
+            end = file_size - 1
+    except ValueError:
+        return None
+
+    if start >= file_size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"content-range": f"bytes */{file_size}"},
+        )
+
+    if end < start:
+        return None
+
+    return start, min(end, file_size - 1)
+
+
+async def iter_file_range(path: str, start: int, end: int):
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def send_file(
+    request: Request,
+    path: Union[str, Path],
+    media_type: Optional[str] = None,
+    etag: Optional[str] = None,
+    cache_control: str = REVALIDATE_CACHE_CONTROL,
+):
+    """
+    Serve a file with validators, conditional GET and single range support.
+    If no etag is provided, a strong one is derived from the file content.
+    """
+    path = str(path)
+    stat_result = await run_in_threadpool(os.stat, path)
+    file_size = stat_result.st_size
+
+    if etag is None:
+        etag = await get_content_etag(path, stat_result)
+
+    media_type = media_type or mimetypes.guess_type(path)[0] or "text/plain"
+
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "accept-ranges": "bytes",
+        "cache-control": cache_control,
+    }
+
+    if is_not_modified(request.headers, etag, stat_result.st_mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # A stale If-Range means the client copy changed, send the full content
+    if range_header and (not if_range or if_range.strip() == etag):
+        if byte_range := parse_range_header(range_header, file_size):
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{file_size}"
+            headers["content-length"] = str(end - start + 1)
+            return StreamingResponse(
+                iter_file_range(path, start, end),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type=media_type,
+                headers=headers,
+            )
+
+    return FileResponse(
+        path, media_type=media_type, headers=headers, stat_result=stat_result
+    )
+
+
 @app.get("/auth/config")
 async def auth(request: Request):
     return get_configuration()
@@ -560,7 +758,7 @@ async def project_settings(
         if chat_profiles:
             profiles = [p.to_dict() for p in chat_profiles]
 
-    if config.code.on_audio_chunk:
+    if config.code.on_audio_chunk or config.code.on_audio_stream:
         config.features.audio.enabled = True
 
     return JSONResponse(
@@ -735,6 +933,7 @@ async def upload_file(
 
 @app.get("/project/file/{file_id}")
 async def get_file(
+    request: Request,
     file_id: str,
     session_id: Optional[str] = None,
 ):
@@ -750,13 +949,21 @@ async def get_file(
 
     if file_id in session.files:
         file = session.files[file_id]
-        return FileResponse(file["path"], media_type=file["type"])
+        return await send_file(
+            request,
+            file["path"],
+            media_type=file["type"],
+            # Session files are never rewritten, the id is a strong validator
+            etag=f'"{file_id}"',
+            cache_control=IMMUTABLE_CACHE_CONTROL,
+        )
     else:
         raise HTTPException(status_code=404, detail="File not found")
 
 
 @app.get("/files/{filename:path}")
 async def serve_file(
+    request: Request,
     filename: str,
     current_user: Annotated[Union[User, PersistedUser], Depends(get_current_user)],
 ):
@@ -768,7 +975,7 @@ async def serve_file(
         raise HTTPException(status_code=400, detail="Invalid filename")
 
     if file_path.is_file():
-        return FileResponse(file_path)
+        return await send_file(request, file_path)
     else:
         raise HTTPException(status_code=404, detail="File not found")
 
@@ -815,6 +1022,71 @@ def status_check():
     return {"message": "Site is operational"}
 
 
+registry.gauge(
+    "chainlit_websocket_sessions",
+    "Number of active websocket sessions.",
+    callback=lambda: len(ws_sessions_id),
+)
+registry.gauge(
+    "chainlit_user_sessions",
+    "Number of user sessions held in memory.",
+    callback=lambda: len(user_sessions),
+)
+registry.gauge(
+    "chainlit_messages_running",
+    "Number of user messages being processed.",
+    callback=lambda: scheduler.running,
+)
+registry.gauge(
+    "chainlit_messages_queued",
+    "Number of user messages waiting for a processing slot.",
+    callback=lambda: scheduler.queued,
+)
+registry.gauge(
+    "chainlit_outbound_queue_depth",
+    "Number of websocket events waiting to be sent, across sessions.",
+    callback=lambda: sum(s.outbound.depth for s in list(ws_sessions_id.values())),
+)
+registry.gauge(
+    "chainlit_event_loop_lag_seconds",
+    "Last measured event loop lag.",
+    callback=lambda: lag_monitor.lag,
+)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Expose the metrics in the Prometheus text format."""
+    if not config.project.expose_metrics:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    return Response(
+        content=registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@app.get("/admission")
+async def admission_state():
+    """
+    Return the admission thresholds and current values.
+    Respond with a 503 when new connections are refused, so that a load balancer can route them elsewhere.
+    """
+    if not config.project.admission.expose_endpoint:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    state = admission_controller.state()
+
+    if state["accepting"]:
+        return JSONResponse(content=state)
+
+    return JSONResponse(
+        content=state,
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"retry-after": str(state["retryAfter"])},
+    )
+
+
 def register_wildcard_route_handler():
     @app.get("/{path:path}")
     async def serve(request: Request, path: str):
@@ -6,6 +6,7 @@ import uuid
 from typing import (
     TYPE_CHECKING,
     Any,
+    Awaitable,
     Callable,
     Deque,
     Dict,
@@ -16,11 +17,16 @@ from typing import (
 )
 
 import aiofiles
+from chainlit.config import config
 from chainlit.logger import logger
+from chainlit.outbound import OutboundQueue
 
 if TYPE_CHECKING:
+    from chainlit.audio import AudioStream
+    from chainlit.context import ChainlitContext
     from chainlit.message import Message
     from chainlit.step import Step
+    from chainlit.thread import LazyThread
     from chainlit.types import FileDict, FileReference
     from chainlit.user import PersistedUser, User
 
@@ -221,7 +227,7 @@ class WebsocketSession(BaseSession):
         # Associated socket id
         socket_id: str,
         # Function to emit to the client
-        emit: Callable[[str, Any], None],
+        emit: Callable[[str, Any], Awaitable[Any]],
         # Function to emit to the client and wait for a response
         emit_call: Callable[[Literal["ask", "call_fn"], Any, Optional[int]], Any],
         # User specific environment variables. Empty if no user environment variables are required.
@@ -241,6 +247,8 @@ class WebsocketSession(BaseSession):
         languages: Optional[str] = None,
         # Origin of the request
         http_referer: Optional[str] = None,
+        # Function returning the number of packets buffered by the transport for the client
+        transport_backlog: Optional[Callable[[], int]] = None,
     ):
         super().__init__(
             id=id,
@@ -257,6 +265,25 @@ class WebsocketSession(BaseSession):
         self.socket_id = socket_id
         self.emit_call = emit_call
         self.emit = emit
+        self.transport_backlog = transport_backlog
+
+        # Events are queued and sent in order to the client by a single task
+        self.outbound = OutboundQueue(
+            send=self._send_event,
+            max_size=config.project.max_outbound_queue_size,
+            transport_backlog=lambda: (
+                self.transport_backlog() if self.transport_backlog else 0
+            ),
+            replay_size=config.project.replay_buffer_size,
+        )
+
+        # Context reused by the socket events of the session
+        self.context = None  # type: Optional[ChainlitContext]
+        # Thread resumed by the session, older steps are loaded on demand
+        self.resumed_thread = None  # type: Optional[LazyThread]
+        # Audio recording in progress and the task consuming it
+        self.audio_stream = None  # type: Optional[AudioStream]
+        self.audio_task = None  # type: Optional[asyncio.Task]
 
         self.restored = False
 
@@ -267,6 +294,10 @@ class WebsocketSession(BaseSession):
 
         self.languages = languages
 
+    async def _send_event(self, event: str, data: Any, sequence: int):
+        # The sequence number is sent as a second argument of the event
+        await self.emit(event, (data, sequence))
+
     def restore(self, new_socket_id: str):
         """Associate a new socket id to the session."""
         ws_sessions_sid.pop(self.socket_id, None)
@@ -278,6 +309,12 @@ class WebsocketSession(BaseSession):
         """Delete the session."""
         if self.files_dir.is_dir():
             shutil.rmtree(self.files_dir)
+        self.outbound.close()
+        self.context = None
+        self.resumed_thread = None
+        if self.audio_task:
+            self.audio_task.cancel()
+            self.audio_task = None
         ws_sessions_sid.pop(self.socket_id, None)
         ws_sessions_id.pop(self.id, None)
 
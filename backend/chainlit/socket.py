@@ -1,10 +1,11 @@
 import asyncio
 import json
-import time
 import uuid
-from typing import Any, Dict, Literal
+from typing import Any, Dict, Literal, Optional, Union
 
 from chainlit.action import Action
+from chainlit.admission import admission_controller
+from chainlit.audio import AudioStream
 from chainlit.auth import get_current_user, require_login
 from chainlit.config import config
 from chainlit.context import init_ws_context
@@ -12,24 +13,37 @@ from chainlit.data import get_data_layer
 from chainlit.element import Element
 from chainlit.logger import logger
 from chainlit.message import ErrorMessage, Message
+from chainlit.metrics import message_duration, socket_handler_duration
+from chainlit.scheduler import scheduler
 from chainlit.server import socket
 from chainlit.session import WebsocketSession
 from chainlit.telemetry import trace_event
+from chainlit.thread import LazyThread
 from chainlit.types import (
-    AudioChunk,
     AudioChunkPayload,
     AudioEndPayload,
+    Pagination,
+    ThreadDict,
     UIMessagePayload,
 )
 from chainlit.user_session import user_sessions
+from socketio.exceptions import ConnectionRefusedError as SocketConnectionRefusedError
 
 
-def restore_existing_session(sid, session_id, emit_fn, emit_call_fn):
+def restore_existing_session(
+    sid, session_id, emit_fn, emit_call_fn, transport_backlog_fn, last_sequence=None
+):
     """Restore a session from the sessionId provided by the client."""
     if session := WebsocketSession.get_by_id(session_id):
         session.restore(new_socket_id=sid)
         session.emit = emit_fn
         session.emit_call = emit_call_fn
+        session.transport_backlog = transport_backlog_fn
+        # Send again the events emitted while the client was disconnected
+        if last_sequence is not None and not session.outbound.replay(last_sequence):
+            logger.warning(
+                f"Session {session.id} restored, some events sent while disconnected could not be replayed"
+            )
         trace_event("session_restored")
         return True
     return False
@@ -44,7 +58,18 @@ async def resume_thread(session: WebsocketSession):
     data_layer = get_data_layer()
     if not data_layer or not session.user or not session.thread_id_to_resume:
         return
-    thread = await data_layer.get_thread(thread_id=session.thread_id_to_resume)
+    page_size = config.project.resume_page_size
+    thread: Optional[Union[ThreadDict, LazyThread]] = None
+    if page_size > 0:
+        # Only load the most recent steps, older ones are loaded when the user scrolls back
+        page = await data_layer.get_thread_page(
+            thread_id=session.thread_id_to_resume,
+            pagination=Pagination(first=page_size),
+        )
+        if page:
+            thread = LazyThread(data_layer, page, page_size)
+    else:
+        thread = await data_layer.get_thread(thread_id=session.thread_id_to_resume)
     if not thread:
         return
 
@@ -52,13 +77,16 @@ async def resume_thread(session: WebsocketSession):
     user_is_author = author == session.user.identifier
 
     if user_is_author:
-        metadata = thread.get("metadata", {})
+        metadata = thread.get("metadata") or {}
         user_sessions[session.id] = metadata.copy()
         if chat_profile := metadata.get("chat_profile"):
             session.chat_profile = chat_profile
         if chat_settings := metadata.get("chat_settings"):
             session.chat_settings = chat_settings
 
+        if isinstance(thread, LazyThread):
+            session.resumed_thread = thread
+
         trace_event("thread_resumed")
 
         return thread
@@ -98,14 +126,16 @@ def build_anon_user_identifier(environ):
 
 
 @socket.on("connect")
+@socket_handler_duration.time(event="connect")
 async def connect(sid, environ, auth):
     if (
         not config.code.on_chat_start
         and not config.code.on_message
         and not config.code.on_audio_chunk
+        and not config.code.on_audio_stream
     ):
         logger.warning(
-            "You need to configure at least one of on_chat_start, on_message or on_audio_chunk callback"
+            "You need to configure at least one of on_chat_start, on_message, on_audio_chunk or on_audio_stream callback"
         )
         return False
     user = None
@@ -129,10 +159,40 @@ async def connect(sid, environ, auth):
     def emit_call_fn(event: Literal["ask", "call_fn"], data, timeout):
         return socket.call(event, data, timeout=timeout, to=sid)
 
+    # Session scoped function to get the number of packets not yet written to the client
+    def transport_backlog_fn():
+        try:
+            eio_sid = socket._sio.manager.eio_sid_from_sid(sid, "/")
+            eio_socket = socket._sio.eio.sockets.get(eio_sid)
+        except Exception:
+            return 0
+        return eio_socket.queue.qsize() if eio_socket else 0
+
     session_id = environ.get("HTTP_X_CHAINLIT_SESSION_ID")
-    if restore_existing_session(sid, session_id, emit_fn, emit_call_fn):
+    # Sequence number of the last event received by a reconnecting client
+    last_sequence = auth.get("lastSeq") if isinstance(auth, dict) else None
+    if restore_existing_session(
+        sid,
+        session_id,
+        emit_fn,
+        emit_call_fn,
+        transport_backlog_fn,
+        last_sequence if isinstance(last_sequence, int) else None,
+    ):
         return True
 
+    # Restored sessions are always accepted, only new sessions are shed
+    admission = admission_controller.state()
+    if not admission["accepting"]:
+        logger.warning(
+            f"Connection refused, thresholds exceeded: {', '.join(admission['reasons'])}"
+        )
+        trace_event("connection_refused")
+        # Only the socketio exception sends its data to the client
+        raise SocketConnectionRefusedError(
+            "Server overloaded", {"retryAfter": admission["retryAfter"]}
+        )
+
     user_env_string = environ.get("HTTP_USER_ENV")
     user_env = load_user_env(user_env_string)
 
@@ -144,6 +204,7 @@ async def connect(sid, environ, auth):
         socket_id=sid,
         emit=emit_fn,
         emit_call=emit_call_fn,
+        transport_backlog=transport_backlog_fn,
         client_type=client_type,
         user_env=user_env,
         user=user,
@@ -159,6 +220,7 @@ async def connect(sid, environ, auth):
 
 
 @socket.on("connection_successful")
+@socket_handler_duration.time(event="connection_successful")
 async def connection_successful(sid):
     context = init_ws_context(sid)
 
@@ -178,7 +240,9 @@ async def connection_successful(sid):
                 {"interaction": "resume", "thread_id": thread.get("id")},
             )
             await config.code.on_chat_resume(thread)
-            await context.emitter.resume_thread(thread)
+            await context.emitter.resume_thread(
+                thread.to_dict() if isinstance(thread, LazyThread) else thread
+            )
             return
 
     if config.code.on_chat_start:
@@ -186,7 +250,20 @@ async def connection_successful(sid):
         context.session.current_task = task
 
 
+@socket.on("load_thread_page")
+@socket_handler_duration.time(event="load_thread_page")
+async def load_thread_page(sid):
+    """Send the previous page of steps of the resumed thread (scroll back)."""
+    session = WebsocketSession.get(sid)
+    if not session or not session.resumed_thread:
+        return None
+
+    init_ws_context(session)
+    return await session.resumed_thread.load_older_steps()
+
+
 @socket.on("clear_session")
+@socket_handler_duration.time(event="clear_session")
 async def clean_session(sid):
     session = WebsocketSession.get(sid)
     if session:
@@ -194,6 +271,7 @@ async def clean_session(sid):
 
 
 @socket.on("disconnect")
+@socket_handler_duration.time(event="disconnect")
 async def disconnect(sid):
     session = WebsocketSession.get(sid)
 
@@ -208,6 +286,12 @@ async def disconnect(sid):
     if session.thread_id and session.has_first_interaction:
         await persist_user_session(session.thread_id, session.to_persistable())
 
+    outbound_stats = session.outbound.stats()
+    if outbound_stats["dropped"]:
+        logger.info(
+            f"Session {session.id} disconnected, outbound queue stats: {outbound_stats}"
+        )
+
     def clear(_sid):
         if session := WebsocketSession.get(_sid):
             # Clean up the user session
@@ -228,6 +312,7 @@ async def disconnect(sid):
 
 
 @socket.on("stop")
+@socket_handler_duration.time(event="stop")
 async def stop(sid):
     if session := WebsocketSession.get(sid):
         trace_event("stop_task")
@@ -239,11 +324,13 @@ async def stop(sid):
 
         if session.current_task:
             session.current_task.cancel()
+        scheduler.cancel(session.id)
 
         if config.code.on_stop:
             await config.code.on_stop()
 
 
+@message_duration.time()
 async def process_message(session: WebsocketSession, payload: UIMessagePayload):
     """Process a message from the user."""
     try:
@@ -252,8 +339,6 @@ async def process_message(session: WebsocketSession, payload: UIMessagePayload):
         message = await context.emitter.process_user_message(payload)
 
         if config.code.on_message:
-            # Sleep 1ms to make sure any children step starts after the message step start
-            time.sleep(0.001)
             await config.code.on_message(message)
     except asyncio.CancelledError:
         pass
@@ -267,26 +352,62 @@ async def process_message(session: WebsocketSession, payload: UIMessagePayload):
 
 
 @socket.on("ui_message")
+@socket_handler_duration.time(event="ui_message")
 async def message(sid, payload: UIMessagePayload):
     """Handle a message sent by the User."""
     session = WebsocketSession.require(sid)
 
-    task = asyncio.create_task(process_message(session, payload))
-    session.current_task = task
+    scheduled = scheduler.schedule(session, lambda: process_message(session, payload))
+
+    if not scheduled:
+        init_ws_context(session)
+        await Message(
+            author="System",
+            content="A message is already being processed. Wait for the answer or stop the task.",
+            disable_feedback=True,
+        ).send()
 
 
 @socket.on("audio_chunk")
+@socket_handler_duration.time(event="audio_chunk")
 async def audio_chunk(sid, payload: AudioChunkPayload):
     """Handle an audio chunk sent by the user."""
     session = WebsocketSession.require(sid)
 
     init_ws_context(session)
 
-    if config.code.on_audio_chunk:
-        asyncio.create_task(config.code.on_audio_chunk(AudioChunk(**payload)))
+    if not config.code.on_audio_chunk and not config.code.on_audio_stream:
+        return
+
+    if payload["isStart"] or not session.audio_stream:
+        if session.audio_stream:
+            session.audio_stream.end()
+        audio_settings = config.features.audio
+        stream = AudioStream(
+            max_chunks=audio_settings.max_buffered_chunks,
+            frame_size=audio_settings.frame_size,
+        )
+        session.audio_stream = stream
+        # A single task consumes the chunks, in order
+        session.audio_task = asyncio.create_task(process_audio_stream(stream))
+
+    session.audio_stream.put(payload)
+
+
+async def process_audio_stream(stream: AudioStream):
+    if config.code.on_audio_stream:
+        await config.code.on_audio_stream(stream)
+    elif config.code.on_audio_chunk:
+        async for chunk in stream:
+            await config.code.on_audio_chunk(chunk)
+
+    stats = stream.stats()
+    if stats["dropped"] or stats["late"]:
+        logger.warning(f"Audio chunks lost during the recording: {stats}")
 
 
 @socket.on("audio_end")
+@socket_handler_duration.time(event="audio_end")
 async def audio_end(sid, payload: AudioEndPayload):
     """Handle the end of the audio stream."""
     session = WebsocketSession.require(sid)
@@ -298,6 +419,19 @@ async def audio_end(sid, payload: AudioEndPayload):
             session.has_first_interaction = True
             asyncio.create_task(context.emitter.init_thread("audio"))
 
+        # Let the app process the last chunks before the end of the stream
+        if session.audio_stream:
+            session.audio_stream.end()
+            session.audio_stream = None
+        if session.audio_task:
+            try:
+                await session.audio_task
+            except Exception as e:
+                # The end of the recording is still handled
+                logger.exception(f"Error while processing the audio stream: {e}")
+            finally:
+                session.audio_task = None
+
         file_elements = []
         if config.code.on_audio_end:
             file_refs = payload.get("fileReferences")
@@ -331,6 +465,7 @@ async def process_action(action: Action):
 
 
 @socket.on("action_call")
+@socket_handler_duration.time(event="action_call")
 async def call_action(sid, action):
     """Handle an action call from the UI."""
     context = init_ws_context(sid)
@@ -358,6 +493,7 @@ async def call_action(sid, action):
 
 
 @socket.on("chat_settings_change")
+@socket_handler_duration.time(event="chat_settings_change")
 async def change_settings(sid, settings: Dict[str, Any]):
     """Handle change settings submit from the UI."""
     context = init_ws_context(sid)
@@ -1,20 +1,23 @@
 import asyncio
+import copy
 import inspect
 import json
-import time
+import random
 import uuid
 from functools import wraps
-from typing import Callable, Dict, List, Optional, TypedDict, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypedDict, Union, cast
 
+from chainlit.batch import current_batch
+from chainlit.clock import utc_now
 from chainlit.config import config
-from chainlit.context import context, local_steps
+from chainlit.context import get_context, local_steps
 from chainlit.data import get_data_layer
 from chainlit.element import Element
 from chainlit.logger import logger
+from chainlit.sync import run_nowait
 from chainlit.telemetry import trace_event
 from chainlit.types import FeedbackDict
 from literalai import BaseGeneration
-from literalai.helper import utc_now
 from literalai.step import StepType, TrueStepType
 
 
@@ -42,6 +45,87 @@ class StepDict(TypedDict, total=False):
     feedback: Optional[FeedbackDict]
 
 
+# Nesting depth below which the input and output values are elided
+MAX_CONTENT_DEPTH = 10
+# Marker of an elided or truncated input or output value
+TRUNCATED_CONTENT = "..."
+
+# Keys identifying a step, part of every partial update
+STEP_IDENTITY_KEYS = ("id", "threadId")
+
+# Steps remembered by a session to resolve the parent of a sampled step by its id
+MAX_SAMPLED_STEPS = 1000
+
+
+def snapshot_step_dict(step_dict: StepDict) -> StepDict:
+    """Copy a step dict, copying its dict and list values so that in place changes are detected."""
+    snapshot = {
+        key: copy.copy(value) if isinstance(value, (dict, list)) else value
+        for key, value in step_dict.items()
+    }
+    return cast(StepDict, snapshot)
+
+
+def get_step_changes(step_dict: StepDict, previous: Optional[StepDict]) -> StepDict:
+    """
+    Return the fields of the step dict that changed since the previous one (all of them
+    if there is no previous one), with the identity keys.
+    """
+    current = cast(Dict[str, Any], step_dict)
+    if previous is None:
+        return cast(StepDict, dict(current))
+
+    previous_values = cast(Dict[str, Any], previous)
+    changes = {key: current[key] for key in STEP_IDENTITY_KEYS if key in current}
+    for key, value in current.items():
+        if key not in previous_values or (
+            previous_values[key] is not value and previous_values[key] != value
+        ):
+            changes[key] = value
+    return cast(StepDict, changes)
+
+
+def has_step_changes(changes: StepDict) -> bool:
+    return any(key not in STEP_IDENTITY_KEYS for key in changes)
+
+
+def sample_step(step_type: str, draw: float) -> Tuple[bool, bool]:
+    """
+    Decide whether a step is sent to the UI and persisted, from the random draw
+    of its trace and the `step_sampling` config.
+    """
+    sampling = config.project.step_sampling
+    rate = sampling.type_rates.get(step_type, 1)
+    if sampling.chat_profile_rates:
+        chat_profile = get_context().session.chat_profile or ""
+        rate *= sampling.chat_profile_rates.get(chat_profile, 1)
+    return draw < sampling.emit_rate * rate, draw < sampling.persist_rate * rate
+
+
+class StreamBuffer:
+    """
+    Text of a step or message being streamed. Tokens are appended to a list
+    and joined when the text is read, instead of rebuilding the whole text
+    for every token.
+    """
+
+    __slots__ = ("_text", "_tokens")
+
+    def __init__(self, text: Any = ""):
+        self._text = text
+        self._tokens = []  # type: List[str]
+
+    def append(self, token: str):
+        self._tokens.append(token)
+
+    @property
+    def text(self) -> Any:
+        if self._tokens:
+            self._text = "".join([self._text or ""] + self._tokens)
+            self._tokens = []
+        return self._text
+
+
 def step(
     original_function: Optional[Callable] = None,
     *,
@@ -53,64 +137,128 @@ def step(
     root: bool = False,
     language: Optional[str] = None,
     show_input: Union[bool, str] = False,
+    update_debounce: float = 0,
+    capture_input: bool = True,
+    capture_output: bool = True,
+    capture_sample_rate: float = 1,
+    max_content_size: int = 0,
 ):
-    """Step decorator for async and sync functions."""
+    """
+    Step decorator for async and sync functions.
+
+    The arguments and the result of the function are captured as the step
+    input and output, unless `capture_input` / `capture_output` is False. They
+    are only captured for a `capture_sample_rate` fraction of the calls, and
+    truncated to about `max_content_size` characters if set.
+    The chunks yielded by generators are streamed to the step output.
+    """
+
+    def should_capture() -> bool:
+        return capture_sample_rate >= 1 or random.random() < capture_sample_rate
+
+    def make_step() -> "Step":
+        return Step(
+            type=type,
+            name=name,
+            id=id,
+            disable_feedback=disable_feedback,
+            root=root,
+            tags=tags,
+            language=language,
+            show_input=show_input,
+            update_debounce=update_debounce,
+            max_content_size=max_content_size,
+        )
+
+    def capture_args(step: "Step", args, kwargs) -> bool:
+        capture = should_capture()
+        if capture and capture_input:
+            # Serialized when the step is sent
+            step.input = {"args": args, "kwargs": kwargs}
+        return capture and capture_output
 
     def wrapper(func: Callable):
         nonlocal name
         if not name:
             name = func.__name__
 
+        # Handle async generator decorator, the chunks are streamed to the step
+
+        if inspect.isasyncgenfunction(func):
+
+            @wraps(func)
+            async def async_gen_wrapper(*args, **kwargs):
+                caller_steps = local_steps.get()
+                async with make_step() as step:
+                    step_steps = local_steps.get()
+                    stream = capture_args(step, args, kwargs)
+                    async for chunk in func(*args, **kwargs):
+                        if stream:
+                            await step.stream_token(
+                                chunk if isinstance(chunk, str) else str(chunk)
+                            )
+                        # The caller runs outside of the step while it is suspended
+                        local_steps.set(caller_steps)
+                        try:
+                            yield chunk
+                        finally:
+                            local_steps.set(step_steps)
+
+            return async_gen_wrapper
+
         # Handle async decorator
 
-        if inspect.iscoroutinefunction(func):
+        elif inspect.iscoroutinefunction(func):
 
             @wraps(func)
             async def async_wrapper(*args, **kwargs):
-                async with Step(
-                    type=type,
-                    name=name,
-                    id=id,
-                    disable_feedback=disable_feedback,
-                    root=root,
-                    tags=tags,
-                    language=language,
-                    show_input=show_input,
-                ) as step:
-                    try:
-                        step.input = {"args": args, "kwargs": kwargs}
-                    except:
-                        pass
+                async with make_step() as step:
+                    capture = capture_args(step, args, kwargs)
                     result = await func(*args, **kwargs)
                     try:
-                        if result and not step.output:
+                        if capture and result and not step.output:
                             step.output = result
                     except:
                         pass
                     return result
 
             return async_wrapper
+
+        # Handle generator decorator, the chunks are streamed to the step
+
+        elif inspect.isgeneratorfunction(func):
+
+            @wraps(func)
+            def gen_wrapper(*args, **kwargs):
+                caller_steps = local_steps.get()
+                with make_step() as step:
+                    step_steps = local_steps.get()
+                    stream = capture_args(step, args, kwargs)
+                    for chunk in func(*args, **kwargs):
+                        if stream:
+                            # Scheduled in order, before the final update of the step
+                            run_nowait(
+                                step.stream_token(
+                                    chunk if isinstance(chunk, str) else str(chunk)
+                                )
+                            )
+                        # The caller runs outside of the step while it is suspended
+                        local_steps.set(caller_steps)
+                        try:
+                            yield chunk
+                        finally:
+                            local_steps.set(step_steps)
+
+            return gen_wrapper
         else:
             # Handle sync decorator
             @wraps(func)
             def sync_wrapper(*args, **kwargs):
-                with Step(
-                    type=type,
-                    name=name,
-                    id=id,
-                    disable_feedback=disable_feedback,
-                    root=root,
-                    tags=tags,
-                    language=language,
-                    show_input=show_input,
-                ) as step:
-                    try:
-                        step.input = {"args": args, "kwargs": kwargs}
-                    except:
-                        pass
+                with make_step() as step:
+                    capture = capture_args(step, args, kwargs)
                     result = func(*args, **kwargs)
                     try:
-                        if result and not step.output:
+                        if capture and result and not step.output:
                             step.output = result
                     except:
                         pass
@@ -150,6 +298,8 @@ class Step:
     language: Optional[str]
     elements: Optional[List[Element]]
     fail_on_persist_error: bool
+    update_debounce: float
+    max_content_size: int
 
     def __init__(
         self,
@@ -164,12 +314,26 @@ class Step:
         root: bool = False,
         language: Optional[str] = None,
         show_input: Union[bool, str] = False,
+        update_debounce: float = 0,
+        max_content_size: int = 0,
     ):
         trace_event(f"init {self.__class__.__name__} {type}")
-        time.sleep(0.001)
+        # Last step dict sent to the UI, to only send the changed fields on update
+        self._last_dict = None  # type: Optional[StepDict]
+        # Pending debounced update
+        self._update_task = None  # type: Optional[asyncio.Task]
+        # Sampling of the step (see the step_sampling config)
+        self._parent_step = None  # type: Optional[Step]
+        self._draw = None  # type: Optional[float]
+        self._sampling = None  # type: Optional[Tuple[bool, bool]]
+        self._emit_skipped = False
+        self._persist_skipped = False
         self._input = ""
-        self._output = ""
-        self.thread_id = context.session.thread_id
+        self._output = StreamBuffer()
+        # Input and output values set but not serialized yet
+        self._raw_input = None  # type: Any
+        self._raw_output = None  # type: Any
+        self.thread_id = get_context().session.thread_id
         self.name = name or ""
         self.type = type
         self.id = id or str(uuid.uuid4())
@@ -180,6 +344,10 @@ class Step:
         self.show_input = show_input
         self.parent_id = parent_id
         self.root = root
+        # Delay (in seconds) during which successive updates are sent at once
+        self.update_debounce = update_debounce
+        # Maximum number of characters of the input and output, 0 for no limit
+        self.max_content_size = max_content_size
 
         self.language = language
         self.generation = None
@@ -196,21 +364,44 @@ class Step:
     def _clean_content(self, content):
         """
         Recursively checks and converts bytes objects in content.
+        Containers nested deeper than MAX_CONTENT_DEPTH are elided, and if
+        max_content_size is set the values past that size are not visited.
         """
+        budget = self.max_content_size if self.max_content_size > 0 else None
 
-        def handle_bytes(item):
+        def handle_bytes(item, depth=0):
+            nonlocal budget
             if isinstance(item, bytes):
                 return "STRIPPED_BINARY_DATA"
-            elif isinstance(item, dict):
-                return {k: handle_bytes(v) for k, v in item.items()}
-            elif isinstance(item, list):
-                return [handle_bytes(i) for i in item]
-            elif isinstance(item, tuple):
-                return tuple(handle_bytes(i) for i in item)
+            elif isinstance(item, (dict, list, tuple)):
+                if depth >= MAX_CONTENT_DEPTH:
+                    return TRUNCATED_CONTENT
+                is_dict = isinstance(item, dict)
+                entries = []
+                for key, value in item.items() if is_dict else enumerate(item):
+                    if budget is not None and budget <= 0:
+                        entries.append((TRUNCATED_CONTENT, TRUNCATED_CONTENT))
+                        break
+                    entries.append((key, handle_bytes(value, depth + 1)))
+                if is_dict:
+                    return dict(entries)
+                values = [value for _, value in entries]
+                return tuple(values) if isinstance(item, tuple) else values
+            elif budget is not None:
+                if isinstance(item, str):
+                    item = item[: max(budget, 0)]
+                    budget -= len(item) + 1
+                else:
+                    budget -= 1
             return item
 
         return handle_bytes(content)
 
+    def _truncate_content(self, content: str) -> str:
+        if 0 < self.max_content_size < len(content):
+            return content[: self.max_content_size] + TRUNCATED_CONTENT
+        return content
+
     def _process_content(self, content, set_language=False):
         if content is None:
             return ""
@@ -235,23 +426,48 @@ class Step:
             processed_content = str(content).replace("\\n", "\n")
             if set_language:
                 self.language = "text"
-        return processed_content
+        return self._truncate_content(processed_content)
+
+    def _serialize_content(self, content, set_language=False) -> str:
+        try:
+            return self._process_content(content, set_language=set_language)
+        except Exception as e:
+            logger.warning(f"Failed to serialize the content of step {self.name}: {e}")
+            return ""
 
     @property
     def input(self):
+        if self._raw_input is not None:
+            self._input = self._serialize_content(self._raw_input)
+            self._raw_input = None
         return self._input
 
     @input.setter
     def input(self, content: Union[Dict, str]):
-        self._input = self._process_content(content, set_language=False)
+        # Values other than strings are serialized when read
+        if content is None or isinstance(content, str):
+            self._raw_input = None
+            self._input = self._truncate_content(content or "")
+        else:
+            self._raw_input = content
 
     @property
     def output(self):
-        return self._output
+        if self._raw_output is not None:
+            self._output = StreamBuffer(
+                self._serialize_content(self._raw_output, set_language=True)
+            )
+            self._raw_output = None
+        return self._output.text
 
     @output.setter
     def output(self, content: Union[Dict, str]):
-        self._output = self._process_content(content, set_language=True)
+        # Values other than strings are serialized when read
+        if content is None or isinstance(content, str):
+            self._raw_output = None
+            self._output = StreamBuffer(self._truncate_content(content or ""))
+        else:
+            self._raw_output = content
 
     def to_dict(self) -> StepDict:
         _dict: StepDict = {
@@ -276,21 +492,134 @@ class Step:
         }
         return _dict
 
+    def _get_parent_step(self) -> "Optional[Step]":
+        # Steps of the integrations are not entered, their parent is found by id
+        if self._parent_step is None and self.parent_id:
+            self._parent_step = get_context().sampled_steps.get(self.parent_id)
+        return self._parent_step
+
+    def _remember_sampled_step(self):
+        sampled_steps = get_context().sampled_steps
+        sampled_steps[self.id] = self
+        sampled_steps.move_to_end(self.id)
+        if len(sampled_steps) > MAX_SAMPLED_STEPS:
+            sampled_steps.popitem(last=False)
+
+    def _get_draw(self) -> float:
+        # The steps of a trace share the draw of their root step
+        if self._draw is None:
+            parent_step = self._get_parent_step()
+            self._draw = parent_step._get_draw() if parent_step else random.random()
+        return self._draw
+
+    def _get_sampling(self) -> Tuple[bool, bool]:
+        """Return whether the step is sent to the UI and whether it is persisted."""
+        sampling = config.project.step_sampling
+        if not sampling.enabled:
+            return True, True
+        if self.is_error and sampling.keep_errors:
+            return True, True
+        if self._sampling is None:
+            self._sampling = sample_step(self.type, self._get_draw())
+        return self._sampling
+
+    async def _keep_ancestors(self, emit: bool, persist: bool):
+        """Send and persist the sampled out ancestors of a step that is kept."""
+        if not config.project.step_sampling.enabled or not (emit or persist):
+            return
+        parent_step = self._get_parent_step()
+        if not parent_step:
+            return
+
+        parent_emit, parent_persist = parent_step._get_sampling()
+        emit_parent = emit and not parent_emit
+        persist_parent = persist and not parent_persist
+        if not emit_parent and not persist_parent:
+            # The ancestors of a kept step are kept
+            return
+
+        parent_step._sampling = (parent_emit or emit, parent_persist or persist)
+        # From the root step down, a step is created before its children
+        await parent_step._keep_ancestors(emit, persist)
+        if (emit_parent and parent_step._emit_skipped) or (
+            persist_parent and parent_step._persist_skipped
+        ):
+            await parent_step._send_update()
+
     async def update(self):
         """
         Update a step already sent to the UI.
+        Only the fields changed since the step was sent are sent to the UI.
+        If `update_debounce` is set, the updates made within this delay are sent at once.
         """
+        if self.update_debounce > 0:
+            if not self._update_task:
+                self._update_task = asyncio.create_task(self._debounced_update())
+            return True
+
+        return await self._send_update()
+
+    async def _debounced_update(self):
+        await asyncio.sleep(self.update_debounce)
+        self._update_task = None
+        await self._send_update()
+
+    def _cancel_pending_update(self) -> bool:
+        if not self._update_task:
+            return False
+        self._update_task.cancel()
+        self._update_task = None
+        return True
+
+    async def flush_update(self):
+        """Send the pending debounced update now."""
+        if self._cancel_pending_update():
+            await self._send_update()
+
+    async def _send_update(self):
         trace_event("update_step")
 
         if self.streaming:
             self.streaming = False
 
+        emit, persist = self._get_sampling()
+        if not emit and not persist:
+            return True
+        if (emit and self._emit_skipped) or (persist and self._persist_skipped):
+            # Sampled out when sent, but kept after all (e.g. the step failed)
+            await self._keep_ancestors(emit, persist)
+
         step_dict = self.to_dict()
+        if emit and not self._emit_skipped:
+            changes = get_step_changes(step_dict, self._last_dict)
+            self._last_dict = snapshot_step_dict(step_dict)
+        else:
+            changes = step_dict.copy()
+        has_changes = has_step_changes(changes)
         data_layer = get_data_layer()
 
-        if data_layer:
+        if data_layer and persist and self._persist_skipped:
+            # Sampled out when sent, but kept after all (e.g. the step failed)
+            self._persist_skipped = False
             try:
-                asyncio.create_task(data_layer.update_step(step_dict.copy()))
+                asyncio.create_task(data_layer.create_step(step_dict.copy()))
+                self.persisted = True
+            except Exception as e:
+                if self.fail_on_persist_error:
+                    raise e
+                logger.error(f"Failed to persist step creation: {str(e)}")
+        elif data_layer and persist and has_changes:
+            batch = current_batch.get()
+            try:
+                # A step waiting to be created by the current batch is created updated
+                if not (batch and batch.persist_update(step_dict.copy())):
+                    asyncio.create_task(
+                        data_layer.update_step(
+                            changes.copy()
+                            if data_layer.partial_step_updates
+                            else step_dict.copy()
+                        )
+                    )
             except Exception as e:
                 if self.fail_on_persist_error:
                     raise e
@@ -302,10 +631,23 @@ class Step:
         if config.ui.hide_cot and self.parent_id:
             return
 
+        if not emit or not has_changes:
+            return True
+
+        # Sampled out when sent, the whole step is sent now
+        send_whole_step = self._emit_skipped
+        if send_whole_step:
+            self._emit_skipped = False
+            self._last_dict = snapshot_step_dict(step_dict)
+
         if not config.features.prompt_playground and "generation" in step_dict:
             step_dict.pop("generation", None)
+            changes.pop("generation", None)
 
-        await context.emitter.update_step(step_dict)
+        if send_whole_step:
+            await get_context().emitter.send_step(step_dict)
+        else:
+            await get_context().emitter.patch_step(step_dict, changes)
 
         return True
 
@@ -314,6 +656,7 @@ class Step:
         Remove a step already sent to the UI.
         """
         trace_event("remove_step")
+        self._cancel_pending_update()
 
         step_dict = self.to_dict()
         data_layer = get_data_layer()
@@ -326,7 +669,7 @@ class Step:
                     raise e
                 logger.error(f"Failed to persist step deletion: {str(e)}")
 
-        await context.emitter.delete_step(step_dict)
+        await get_context().emitter.delete_step(step_dict)
 
         return True
 
@@ -334,6 +677,16 @@ class Step:
         if self.persisted:
             return
 
+        if config.project.step_sampling.enabled:
+            self._remember_sampled_step()
+        emit, persist = self._get_sampling()
+        self._emit_skipped = not emit
+        self._persist_skipped = not persist
+        if not emit and not persist:
+            # Sampled out, nothing is serialized
+            return self.id
+        await self._keep_ancestors(emit, persist)
+
         if config.code.author_rename:
             self.name = await config.code.author_rename(self.name)
 
@@ -341,12 +694,17 @@ class Step:
             self.streaming = False
 
         step_dict = self.to_dict()
+        if emit:
+            self._last_dict = snapshot_step_dict(step_dict)
 
         data_layer = get_data_layer()
 
-        if data_layer:
+        if data_layer and persist:
             try:
-                asyncio.create_task(data_layer.create_step(step_dict.copy()))
+                if batch := current_batch.get():
+                    batch.persist_step(step_dict.copy())
+                else:
+                    asyncio.create_task(data_layer.create_step(step_dict.copy()))
                 self.persisted = True
             except Exception as e:
                 if self.fail_on_persist_error:
@@ -356,13 +714,13 @@ class Step:
         tasks = [el.send(for_id=self.id) for el in self.elements]
         await asyncio.gather(*tasks)
 
-        if config.ui.hide_cot and self.parent_id:
+        if not emit or (config.ui.hide_cot and self.parent_id):
             return self.id
 
         if not config.features.prompt_playground and "generation" in step_dict:
             step_dict.pop("generation", None)
 
-        await context.emitter.send_step(step_dict)
+        await get_context().emitter.send_step(step_dict)
 
         return self.id
 
@@ -372,24 +730,33 @@ class Step:
         Once all tokens have been streamed, call .send() to end the stream and persist the step if persistence is enabled.
         """
 
+        emitter = get_context().emitter
+
         if not self.streaming:
             self.streaming = True
-            step_dict = self.to_dict()
-            await context.emitter.stream_start(step_dict)
+            if config.project.step_sampling.enabled:
+                self._remember_sampled_step()
+            emit, _ = self._get_sampling()
+            self._emit_skipped = not emit
+            if emit:
+                await self._keep_ancestors(emit, False)
+                step_dict = self.to_dict()
+                self._last_dict = snapshot_step_dict(step_dict)
+                await emitter.stream_start(step_dict)
 
         if is_sequence:
             self.output = token
+        elif isinstance(token, str) and self._raw_output is None:
+            self._output.append(token)
         else:
             self.output += token
 
         assert self.id
 
-        if config.ui.hide_cot and self.parent_id:
+        if self._emit_skipped or (config.ui.hide_cot and self.parent_id):
             return
 
-        await context.emitter.send_token(
-            id=self.id, token=token, is_sequence=is_sequence
-        )
+        await emitter.send_token(id=self.id, token=token, is_sequence=is_sequence)
 
     # Handle parameter less decorator
     def __call__(self, func):
@@ -406,12 +773,14 @@ class Step:
     # Handle Context Manager Protocol
     async def __aenter__(self):
         self.start = utc_now()
+        context = get_context()
         previous_steps = local_steps.get() or []
         parent_step = previous_steps[-1] if previous_steps else None
 
         if not self.parent_id and not self.root:
             if parent_step:
                 self.parent_id = parent_step.id
+                self._parent_step = parent_step
             elif context.session.root_message:
                 self.parent_id = context.session.root_message.id
         context.active_steps.append(self)
@@ -421,6 +790,7 @@ class Step:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         self.end = utc_now()
+        context = get_context()
 
         if self in context.active_steps:
             context.active_steps.remove(self)
@@ -430,10 +800,13 @@ class Step:
             local_active_steps.remove(self)
             local_steps.set(local_active_steps)
 
-        await self.update()
+        # Always send the final state right away, with the pending update if any
+        self._cancel_pending_update()
+        await self._send_update()
 
     def __enter__(self):
         self.start = utc_now()
+        context = get_context()
 
         previous_steps = local_steps.get() or []
         parent_step = previous_steps[-1] if previous_steps else None
@@ -441,16 +814,19 @@ class Step:
         if not self.parent_id and not self.root:
             if parent_step:
                 self.parent_id = parent_step.id
+                self._parent_step = parent_step
             elif context.session.root_message:
                 self.parent_id = context.session.root_message.id
         context.active_steps.append(self)
         local_steps.set(previous_steps + [self])
 
-        asyncio.create_task(self.send())
+        # Also called from worker threads (see make_async), where there is no running loop
+        run_nowait(self.send())
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.end = utc_now()
+        context = get_context()
         if self in context.active_steps:
             context.active_steps.remove(self)
 
@@ -459,4 +835,5 @@ class Step:
             local_active_steps.remove(self)
             local_steps.set(local_active_steps)
 
-        asyncio.create_task(self.update())
+        self._cancel_pending_update()
+        run_nowait(self._send_update())
@@ -40,3 +40,22 @@ def run_sync(co: Coroutine[Any, Any, T_Retval]) -> T_Retval:
             context_preserving_coroutine(), loop=current_context.loop
         )
         return result.result()
+
+
+def run_nowait(co: Coroutine[Any, Any, Any]):
+    """
+    Run the coroutine in the main event loop without waiting for it.
+    From a worker thread, the coroutine is queued and the coroutines queued for
+    a session run in order.
+    """
+    current_context = context_var.get()
+
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+
+    if running_loop is current_context.loop:
+        asyncio.create_task(co)
+    else:
+        current_context.thread_calls.post(co)
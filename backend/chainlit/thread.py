@@ -0,0 +1,162 @@
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, cast
+
+from chainlit.types import (
+    Pagination,
+    ThreadDict,
+    ThreadPageDict,
+    ThreadPageInfoDict,
+)
+
+if TYPE_CHECKING:
+    from chainlit.data import BaseDataLayer
+    from chainlit.element import ElementDict
+    from chainlit.step import StepDict
+
+PAGED_KEYS = ("steps", "elements", "pageInfo")
+
+
+def paginate_thread(thread: ThreadDict, pagination: Pagination) -> ThreadPageDict:
+    """
+    Return the thread with a page of its steps, most recent first.
+
+    Steps are paginated by root step: a page holds `pagination.first` root steps
+    (all of them if 0) with their children, older than the `pagination.cursor`
+    root step. The elements of the page steps are included, the elements not
+    attached to a step are sent with the first page.
+    """
+    steps = thread["steps"]
+
+    # Group the steps under their root step
+    root_of: Dict[str, str] = {}
+    roots: List[str] = []
+    for step in steps:
+        parent_id = step.get("parentId")
+        if parent_id and parent_id in root_of:
+            root_of[step["id"]] = root_of[parent_id]
+        elif step.get("indent") and roots:
+            # Legacy indented steps are nested under the previous root step
+            root_of[step["id"]] = roots[-1]
+        else:
+            root_of[step["id"]] = step["id"]
+            roots.append(step["id"])
+
+    end = len(roots)
+    if pagination.cursor:
+        # An unknown cursor yields an empty page rather than the latest steps again
+        cursor_root = root_of.get(pagination.cursor)
+        end = roots.index(cursor_root) if cursor_root else 0
+    start = max(end - pagination.first, 0) if pagination.first > 0 else 0
+    page_roots = set(roots[start:end])
+
+    page_steps = [step for step in steps if root_of[step["id"]] in page_roots]
+    page_step_ids = set(step["id"] for step in page_steps)
+    first_page = not pagination.cursor
+    page_elements = [
+        element
+        for element in thread.get("elements") or []
+        if element.get("forId") in page_step_ids
+        or (first_page and element.get("forId") not in root_of)
+    ]
+
+    page: Dict[str, Any] = {
+        key: value for key, value in thread.items() if key not in PAGED_KEYS
+    }
+    page.update(
+        {
+            "steps": page_steps,
+            "elements": page_elements,
+            "pageInfo": ThreadPageInfoDict(
+                hasNextPage=start > 0,
+                startCursor=roots[end - 1] if end > start else None,
+                endCursor=roots[start] if end > start else None,
+            ),
+        }
+    )
+    return cast(ThreadPageDict, page)
+
+
+class LazyThread(Mapping):
+    """
+    Thread being resumed, passed to the `on_chat_resume` hook.
+
+    It reads like a `ThreadDict`, but only the most recent steps are loaded.
+    Older steps are loaded page by page when the user scrolls back, or with
+    `load_older_steps` and `load_all_steps`.
+    """
+
+    def __init__(
+        self,
+        data_layer: "BaseDataLayer",
+        page: ThreadPageDict,
+        page_size: int,
+    ):
+        self.data_layer = data_layer
+        self.page_size = page_size
+
+        self.header: Dict[str, Any] = {
+            key: value for key, value in page.items() if key not in PAGED_KEYS
+        }
+        self.steps: List["StepDict"] = list(page["steps"])
+        self.elements: List["ElementDict"] = list(page.get("elements") or [])
+        self.page_info = page["pageInfo"]
+
+    @property
+    def id(self) -> str:
+        return self.header["id"]
+
+    @property
+    def has_older_steps(self) -> bool:
+        return bool(self.page_info.get("hasNextPage"))
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "steps":
+            return self.steps
+        if key == "elements":
+            return self.elements
+        return self.header[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.header
+        yield "steps"
+        yield "elements"
+
+    def __len__(self) -> int:
+        return len(self.header) + 2
+
+    async def load_older_steps(self) -> Optional[ThreadPageDict]:
+        """Load the previous page of steps. Return None if every step is loaded."""
+        if not self.has_older_steps:
+            return None
+
+        page = await self.data_layer.get_thread_page(
+            self.id,
+            Pagination(first=self.page_size, cursor=self.page_info.get("endCursor")),
+        )
+        if not page or not page["steps"]:
+            self.page_info = ThreadPageInfoDict(
+                hasNextPage=False, startCursor=None, endCursor=None
+            )
+            return None
+
+        self.steps[:0] = page["steps"]
+        self.elements[:0] = page.get("elements") or []
+        self.page_info = page["pageInfo"]
+        return page
+
+    async def load_all_steps(self) -> List["StepDict"]:
+        """Load every step of the thread."""
+        while await self.load_older_steps():
+            pass
+        return self.steps
+
+    def to_dict(self) -> ThreadPageDict:
+        page = dict(self.header)
+        page.update(
+            {
+                "steps": self.steps,
+                "elements": self.elements,
+                "pageInfo": self.page_info,
+            }
+        )
+        return cast(ThreadPageDict, page)
@@ -40,6 +40,20 @@ class ThreadDict(TypedDict):
     elements: Optional[List["ElementDict"]]
 
 
+class ThreadPageInfoDict(TypedDict):
+    hasNextPage: bool
+    # Most recent root step of the page
+    startCursor: Optional[str]
+    # Oldest root step of the page, cursor of the next (older) page
+    endCursor: Optional[str]
+
+
+class ThreadPageDict(ThreadDict):
+    """Thread holding a page of its steps and their elements."""
+
+    pageInfo: ThreadPageInfoDict
+
+
 class Pagination(BaseModel):
     first: int
     cursor: Optional[str] = None
@@ -0,0 +1,30 @@
+import { runTestServer } from '../../support/testUtils';
+
+const SOCKET_PATH = '/ws/socket.io/?EIO=4&transport=polling';
+
+describe('Admission', () => {
+  before(() => {
+    runTestServer();
+  });
+
+  it('should refuse new sessions with a retry delay when saturated', () => {
+    cy.get('.step').should('contain', 'Connected');
+
+    // Open a second session with the socket.io polling transport
+    const headers = { 'X-Chainlit-Session-Id': 'admission-test' };
+    cy.request({ url: SOCKET_PATH, headers }).then((open) => {
+      const { sid } = JSON.parse(open.body.slice(1));
+      const url = `${SOCKET_PATH}&sid=${sid}`;
+
+      cy.request({ method: 'POST', url, headers, body: '40{}' });
+      cy.request({ url, headers }).then((response) => {
+        // Connect error packet of the default namespace
+        expect(response.body.slice(0, 2)).to.equal('44');
+        expect(JSON.parse(response.body.slice(2))).to.deep.equal({
+          message: 'Server overloaded',
+          data: { retryAfter: 5 }
+        });
+      });
+    });
+  });
+});
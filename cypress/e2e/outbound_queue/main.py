@@ -0,0 +1,21 @@
+import asyncio
+
+import chainlit as cl
+
+token_count = 20
+
+
+@cl.on_chat_start
+async def main():
+    msg = cl.Message(content="")
+    await msg.stream_token("tokens:")
+
+    async def stream(index: int):
+        await msg.stream_token(f" {index}")
+        if index % 5 == 4:
+            # The update carries the tokens streamed so far, the later tokens
+            # must not be merged before it
+            await msg.update()
+
+    # Concurrent producers while the outbound queue is full
+    await asyncio.gather(*[stream(index) for index in range(token_count)])
@@ -0,0 +1,15 @@
+import { runTestServer } from '../../support/testUtils';
+
+const tokens = Array.from({ length: 20 }, (_, index) => index).join(' ');
+
+describe('Outbound queue', () => {
+  before(() => {
+    runTestServer();
+  });
+
+  it('should keep the order of the tokens and updates when the queue is full', () => {
+    cy.get('.step').should('have.length', 1);
+
+    cy.get('.step').eq(0).should('contain', `tokens: ${tokens}`);
+  });
+});
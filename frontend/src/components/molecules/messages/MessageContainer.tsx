@@ -15,6 +15,8 @@ interface Props {
   elements: IMessageElement[];
   messages: IStep[];
   setAutoScroll?: (autoScroll: boolean) => void;
+  // Called when the user scrolls to the top, to load older messages
+  onScrollTop?: () => void;
 }
 
 const MessageContainer = memo(
@@ -24,21 +26,39 @@ const MessageContainer = memo(
     context,
     elements,
     messages,
-    setAutoScroll
+    setAutoScroll,
+    onScrollTop
   }: Props) => {
     const ref = useRef<HTMLDivElement>();
+    // Scroll height before older messages are loaded, to keep the scroll position
+    const scrollHeightBeforeLoad = useRef<number>();
 
     useEffect(() => {
-      if (!ref.current || !autoScroll) {
+      if (!ref.current) {
+        return;
+      }
+      if (scrollHeightBeforeLoad.current !== undefined) {
+        ref.current.scrollTop =
+          ref.current.scrollHeight - scrollHeightBeforeLoad.current;
+        scrollHeightBeforeLoad.current = undefined;
+        return;
+      }
+      if (!autoScroll) {
         return;
       }
       ref.current.scrollTop = ref.current.scrollHeight;
     }, [messages, autoScroll]);
 
     const handleScroll = () => {
-      if (!ref.current || !setAutoScroll) return;
+      if (!ref.current) return;
 
       const { scrollTop, scrollHeight, clientHeight } = ref.current;
+      if (scrollTop === 0 && onScrollTop) {
+        scrollHeightBeforeLoad.current = scrollHeight;
+        onScrollTop();
+      }
+
+      if (!setAutoScroll) return;
       const atBottom = scrollTop + clientHeight >= scrollHeight - 10;
       setAutoScroll(atBottom);
     };
@@ -44,6 +44,7 @@ interface Props {
   ) => void;
   callAction?: (action: IAction) => void;
   setAutoScroll?: (autoScroll: boolean) => void;
+  loadOlderMessages?: () => void;
 }
 
 const MessageContainer = memo(
@@ -58,7 +59,8 @@ const MessageContainer = memo(
     onFeedbackUpdated,
     onFeedbackDeleted,
     callAction,
-    setAutoScroll
+    setAutoScroll,
+    loadOlderMessages
   }: Props) => {
     const appSettings = useRecoilValue(settingsState);
     const projectSettings = useRecoilValue(projectSettingsState);
@@ -198,6 +200,7 @@ const MessageContainer = memo(
         messages={messages}
         autoScroll={autoScroll}
         setAutoScroll={setAutoScroll}
+        onScrollTop={loadOlderMessages}
         context={memoizedContext}
       />
     );
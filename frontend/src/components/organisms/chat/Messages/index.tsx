@@ -35,8 +35,8 @@ const Messages = ({
   setAutoScroll
 }: MessagesProps): JSX.Element => {
   const { elements, askUser, avatars, loading, actions } = useChatData();
-  const { messages } = useChatMessages();
-  const { callAction } = useChatInteract();
+  const { messages, hasOlderMessages } = useChatMessages();
+  const { callAction, loadOlderMessages } = useChatInteract();
   const { idToResume } = useChatSession();
   const accessToken = useRecoilValue(accessTokenState);
   const setMessages = useSetRecoilState(messagesState);
@@ -157,6 +157,7 @@ const Messages = ({
       onFeedbackDeleted={onFeedbackDeleted}
       callAction={callActionWithToast}
       setAutoScroll={setAutoScroll}
+      loadOlderMessages={hasOlderMessages ? loadOlderMessages : undefined}
     />
   );
 };
@@ -65,6 +65,11 @@ export const tokenCountState = atom<number>({
   default: 0
 });
 
+export const olderMessagesState = atom<{ hasMore: boolean; loading: boolean }>({
+  key: 'OlderMessages',
+  default: { hasMore: false, loading: false }
+});
+
 export const loadingState = atom<boolean>({
   key: 'Loading',
   default: false
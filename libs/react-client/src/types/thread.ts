@@ -1,3 +1,5 @@
+import { IPageInfo } from '..';
+
 import { IElement } from './element';
 import { IStep } from './step';
 
@@ -10,4 +12,6 @@ export interface IThread {
   metadata?: Record<string, any>;
   steps: IStep[];
   elements?: IElement[];
+  // Set when the thread is resumed page by page
+  pageInfo?: IPageInfo;
 }
@@ -1,5 +1,10 @@
 import { useCallback } from 'react';
-import { useRecoilValue, useResetRecoilState, useSetRecoilState } from 'recoil';
+import {
+  useRecoilState,
+  useRecoilValue,
+  useResetRecoilState,
+  useSetRecoilState
+} from 'recoil';
 import {
   accessTokenState,
   actionState,
@@ -12,6 +17,7 @@ import {
   firstUserInteraction,
   loadingState,
   messagesState,
+  olderMessagesState,
   sessionIdState,
   sessionState,
   sideViewState,
@@ -19,8 +25,16 @@ import {
   threadIdToResumeState,
   tokenCountState
 } from 'src/state';
-import { IAction, IFileRef, IStep } from 'src/types';
-import { addMessage } from 'src/utils/message';
+import {
+  IAction,
+  IAvatarElement,
+  IFileRef,
+  IMessageElement,
+  IStep,
+  ITasklistElement,
+  IThread
+} from 'src/types';
+import { addMessage, nestMessages } from 'src/utils/message';
 
 import { ChainlitAPI } from './api';
 
@@ -33,6 +47,7 @@ const useChatInteract = () => {
   const resetChatSettings = useResetRecoilState(chatSettingsInputsState);
   const resetSessionId = useResetRecoilState(sessionIdState);
   const resetChatSettingsValue = useResetRecoilState(chatSettingsValueState);
+  const resetOlderMessages = useResetRecoilState(olderMessagesState);
 
   const setFirstUserInteraction = useSetRecoilState(firstUserInteraction);
   const setLoading = useSetRecoilState(loadingState);
@@ -45,6 +60,7 @@ const useChatInteract = () => {
   const setIdToResume = useSetRecoilState(threadIdToResumeState);
   const setSideView = useSetRecoilState(sideViewState);
   const setCurrentThreadId = useSetRecoilState(currentThreadIdState);
+  const [olderMessages, setOlderMessages] = useRecoilState(olderMessagesState);
 
   const clear = useCallback(() => {
     session?.socket.emit('clear_session');
@@ -62,6 +78,7 @@ const useChatInteract = () => {
     resetChatSettingsValue();
     setSideView(undefined);
     setCurrentThreadId(undefined);
+    resetOlderMessages();
   }, [session]);
 
   const sendMessage = useCallback(
@@ -92,6 +109,43 @@ const useChatInteract = () => {
     [session?.socket]
   );
 
+  const loadOlderMessages = useCallback(() => {
+    const socket = session?.socket;
+    if (!socket || !olderMessages.hasMore || olderMessages.loading) return;
+
+    setOlderMessages((old) => ({ ...old, loading: true }));
+    socket.emit('load_thread_page', (page?: IThread) => {
+      if (!page) {
+        setOlderMessages({ hasMore: false, loading: false });
+        return;
+      }
+      const older = nestMessages(page.steps);
+      setMessages((oldMessages) => [...older, ...oldMessages]);
+
+      const elements = page.elements || [];
+      setAvatars((old) => [
+        ...(elements as IAvatarElement[]).filter((e) => e.type === 'avatar'),
+        ...old
+      ]);
+      setTasklists((old) => [
+        ...(elements as ITasklistElement[]).filter(
+          (e) => e.type === 'tasklist'
+        ),
+        ...old
+      ]);
+      setElements((old) => [
+        ...(elements as IMessageElement[]).filter(
+          (e) => ['avatar', 'tasklist'].indexOf(e.type) === -1
+        ),
+        ...old
+      ]);
+      setOlderMessages({
+        hasMore: !!page.pageInfo?.hasNextPage,
+        loading: false
+      });
+    });
+  }, [session?.socket, olderMessages]);
+
   const replyMessage = useCallback(
     (message: IStep) => {
       if (askUser) {
@@ -155,6 +209,7 @@ const useChatInteract = () => {
     uploadFile,
     callAction,
     clear,
+    loadOlderMessages,
     replyMessage,
     sendMessage,
     sendAudioChunk,
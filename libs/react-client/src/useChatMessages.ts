@@ -3,18 +3,22 @@ import { useRecoilValue } from 'recoil';
 import {
   currentThreadIdState,
   firstUserInteraction,
-  messagesState
+  messagesState,
+  olderMessagesState
 } from './state';
 
 const useChatMessages = () => {
   const messages = useRecoilValue(messagesState);
   const firstInteraction = useRecoilValue(firstUserInteraction);
   const threadId = useRecoilValue(currentThreadIdState);
+  const olderMessages = useRecoilValue(olderMessagesState);
 
   return {
     threadId,
     messages,
-    firstInteraction
+    firstInteraction,
+    hasOlderMessages: olderMessages.hasMore,
+    loadingOlderMessages: olderMessages.loading
   };
 };
 
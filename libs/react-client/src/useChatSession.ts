@@ -20,6 +20,7 @@ import {
   firstUserInteraction,
   loadingState,
   messagesState,
+  olderMessagesState,
   sessionIdState,
   sessionState,
   tasklistState,
@@ -66,6 +67,7 @@ const useChatSession = () => {
   const [chatProfile, setChatProfile] = useRecoilState(chatProfileState);
   const idToResume = useRecoilValue(threadIdToResumeState);
   const setCurrentThreadId = useSetRecoilState(currentThreadIdState);
+  const setOlderMessages = useSetRecoilState(olderMessagesState);
 
   const _connect = useCallback(
     ({
@@ -81,6 +83,9 @@ const useChatSession = () => {
       const socketPath = pathname.endsWith('/')
         ? 'ws/socket.io'
         : '/ws/socket.io';
+      // Sequence number of the last event received, sent on reconnection so
+      // that the server replays the events emitted while disconnected
+      let lastSeq: number | undefined;
       const socket = io(client.httpEndpoint, {
         path: `${pathname}${socketPath}`,
         extraHeaders: {
@@ -90,6 +95,12 @@ const useChatSession = () => {
           'X-Chainlit-Thread-Id': idToResume || '',
           'user-env': JSON.stringify(userEnv),
           'X-Chainlit-Chat-Profile': chatProfile || ''
+        },
+        auth: (cb) => cb(lastSeq === undefined ? {} : { lastSeq })
+      });
+      socket.onAny((_event: string, _data: unknown, seq?: unknown) => {
+        if (typeof seq === 'number') {
+          lastSeq = seq;
         }
       });
       setSession((old) => {
@@ -105,8 +116,13 @@ const useChatSession = () => {
         setSession((s) => ({ ...s!, error: false }));
       });
 
-      socket.on('connect_error', (_) => {
+      socket.on('connect_error', (err: Error & { data?: any }) => {
         setSession((s) => ({ ...s!, error: true }));
+        // The server is overloaded and refused the connection, retry later
+        const retryAfter = err.data?.retryAfter;
+        if (retryAfter && !socket.active) {
+          setTimeout(() => socket.connect(), retryAfter * 1000);
+        }
       });
 
       socket.on('task_start', () => {
@@ -131,6 +147,11 @@ const useChatSession = () => {
           setChatProfile(thread.metadata?.chat_profile);
         }
         setMessages(messages);
+        // Only the most recent messages are sent, the older ones are loaded on scroll back
+        setOlderMessages({
+          hasMore: !!thread.pageInfo?.hasNextPage,
+          loading: false
+        });
         const elements = thread.elements || [];
         setAvatars(
           (elements as IAvatarElement[]).filter((e) => e.type === 'avatar')
@@ -221,7 +242,7 @@ const useChatSession = () => {
         resetChatSettingsValue();
       });
 
-      socket.on('element', (element: IElement) => {
+      const addElement = (element: IElement) => {
         if (!element.url && element.chainlitKey) {
           element.url = client.getElementUrl(element.chainlitKey, sessionId);
         }
@@ -254,7 +275,9 @@ const useChatSession = () => {
             }
           });
         }
-      });
+      };
+
+      socket.on('element', addElement);
 
       socket.on('remove_element', (remove: { id: string }) => {
         setElements((old) => {
@@ -280,6 +303,28 @@ const useChatSession = () => {
         });
       });
 
+      // Steps, elements and actions sent at once, rendered in a single update
+      socket.on(
+        'batch',
+        ({
+          steps,
+          elements,
+          actions
+        }: {
+          steps: IStep[];
+          elements: IElement[];
+          actions: IAction[];
+        }) => {
+          if (steps.length) {
+            setMessages((oldMessages) => steps.reduce(addMessage, oldMessages));
+          }
+          elements.forEach(addElement);
+          if (actions.length) {
+            setActions((old) => [...old, ...actions]);
+          }
+        }
+      );
+
       socket.on('token_usage', (count: number) => {
         setTokenCount((old) => old + count);
       });
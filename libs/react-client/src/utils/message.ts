@@ -122,7 +122,8 @@ const updateMessageById = (
     const msg = nextMessages[index];
 
     if (isEqual(msg.id, messageId)) {
-      nextMessages[index] = { steps: msg.steps, ...updatedMessage };
+      // Updates may only carry the changed fields
+      nextMessages[index] = { ...msg, ...updatedMessage };
     } else if (hasMessageById(nextMessages, messageId) && msg.steps) {
       msg.steps = updateMessageById(msg.steps, messageId, updatedMessage);
       nextMessages[index] = { ...msg };